@@ -0,0 +1,401 @@
+"""
+Object Library Archive for SIC/XE Assembler
+Bundles object programs into one file with a hashed external-symbol index
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from fileutil import atomic_write
+
+# File layout (all integers little-endian, all text UTF-8):
+#   header | member table | symbol index | string table | member data
+# The symbol index is an open-addressed hash table (FNV-1a, linear probing)
+# mapping an external symbol name to the member that defines it.
+MAGIC = b'SXAR'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHIIIIII')  # magic, version, 0, members, slots, member table, index, strings, strings size
+MEMBER = struct.Struct('<IHHII')       # name offset, name length, 0, data offset, data size
+SLOT = struct.Struct('<IIHHI')         # hash, name offset, name length, 0, member number
+
+EMPTY = 0xFFFFFFFF  # Member number of an unused slot
+
+
+def fnv1a(data):
+    """32-bit FNV-1a hash of bytes"""
+    h = 0x811C9DC5
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def external_symbols(text):
+    """Names an object program exports: its H record name and any D record names"""
+    names = []
+    for line in text.splitlines():
+        fields = line.strip().split('^')
+        if fields[0] == 'H' and len(fields) > 1 and fields[1].strip():
+            names.append(fields[1].strip())
+        elif fields[0] == 'D':
+            # D^name^address^name^address...
+            names.extend(name.strip() for name in fields[1::2] if name.strip())
+    return names
+
+
+def _encode(text, what):
+    """UTF-8 bytes of text; ValueError naming what if it has no UTF-8 form"""
+    try:
+        return text.encode('utf-8')
+    except UnicodeEncodeError:
+        raise ValueError(f"{what} cannot be stored as UTF-8") from None
+
+
+def _slot_count(symbols):
+    """Power of two keeping the table at most half full"""
+    count = 8
+    while count < 2 * symbols:
+        count <<= 1
+    return count
+
+
+def build_archive(filename, members):
+    """Write an archive of (name, object text) members
+    
+    Returns a list of (symbol, member name) for symbols already defined by
+    an earlier member; the first definition is the one indexed. Raises
+    ValueError if a name or text cannot be encoded (say, a file name
+    holding undecodable bytes).
+    """
+    strings = bytearray()
+    string_offsets = {}
+    
+    def intern(name):
+        encoded = _encode(name, f"name {name!r}")
+        if encoded not in string_offsets:
+            string_offsets[encoded] = len(strings)
+            strings.extend(encoded)
+        return string_offsets[encoded], len(encoded)
+        
+    member_names = []
+    symbol_members = {}
+    duplicates = []
+    
+    for number, (name, text) in enumerate(members):
+        member_names.append(intern(name))
+        for symbol in external_symbols(text):
+            if symbol in symbol_members:
+                duplicates.append((symbol, name))
+            else:
+                symbol_members[symbol] = number
+                
+    slot_count = _slot_count(len(symbol_members))
+    slots = [None] * slot_count
+    mask = slot_count - 1
+    
+    for symbol, number in symbol_members.items():
+        offset, length = intern(symbol)
+        h = fnv1a(_encode(symbol, f"symbol {symbol!r}"))
+        i = h & mask
+        while slots[i] is not None:
+            i = (i + 1) & mask
+        slots[i] = (h, offset, length, number)
+        
+    member_table = HEADER.size
+    index = member_table + MEMBER.size * len(members)
+    string_table = index + SLOT.size * slot_count
+    data_offset = string_table + len(strings)
+    
+    out = bytearray(HEADER.pack(MAGIC, VERSION, 0, len(members), slot_count,
+                                member_table, index, string_table, len(strings)))
+    data = bytearray()
+    
+    for (name_offset, name_length), (name, text) in zip(member_names, members):
+        encoded = _encode(text, f"object text of {name!r}")
+        out += MEMBER.pack(name_offset, name_length, 0, data_offset + len(data), len(encoded))
+        data += encoded
+        
+    for slot in slots:
+        if slot is None:
+            out += SLOT.pack(0, 0, 0, 0, EMPTY)
+        else:
+            h, offset, length, number = slot
+            out += SLOT.pack(h, offset, length, 0, number)
+            
+    out += strings
+    out += data
+    
+    atomic_write(filename, out)
+    return duplicates
+
+
+def is_safe_member_name(name):
+    """True if name is a plain file name that stays inside the extract directory
+    
+    Archives may come from elsewhere, so names that are empty, absolute,
+    contain a path separator or a drive, or are '.'/'..' are refused.
+    """
+    if name in ('', '.', '..') or '\0' in name:
+        return False
+    return not any(sep in name for sep in ('/', '\\', ':'))
+
+
+class Archive:
+    """Read-only view of an archive file through mmap"""
+    
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            
+        (magic, version, _, self.member_count, self.slot_count, self._members,
+         self._index, self._strings, _) = HEADER.unpack_from(self._map, 0)
+         
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename}: not a SIC/XE object archive")
+            
+    def close(self):
+        self._map.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        
+    def __len__(self):
+        return self.member_count
+        
+    def _string(self, offset, length):
+        start = self._strings + offset
+        return self._map[start:start + length]
+        
+    def member_name(self, number):
+        name_offset, name_length, _, _, _ = MEMBER.unpack_from(
+            self._map, self._members + number * MEMBER.size
+        )
+        return self._string(name_offset, name_length).decode('utf-8')
+        
+    def member_data(self, number):
+        """Object text of member number"""
+        _, _, _, offset, size = MEMBER.unpack_from(
+            self._map, self._members + number * MEMBER.size
+        )
+        return self._map[offset:offset + size].decode('utf-8')
+        
+    def members(self):
+        """Get [(name, size)] in archive order"""
+        result = []
+        for number in range(self.member_count):
+            _, _, _, _, size = MEMBER.unpack_from(
+                self._map, self._members + number * MEMBER.size
+            )
+            result.append((self.member_name(number), size))
+        return result
+        
+    def find_member(self, name):
+        """Member number with the given name, or None"""
+        for number in range(self.member_count):
+            if self.member_name(number) == name:
+                return number
+        return None
+        
+    def lookup(self, symbol):
+        """Member number defining symbol, or None
+        
+        One hash and usually one probe; names are only compared when the
+        stored hash matches.
+        """
+        key = _encode(symbol, f"symbol {symbol!r}")
+        h = fnv1a(key)
+        mask = self.slot_count - 1
+        i = h & mask
+        
+        while True:
+            slot_hash, offset, length, _, number = SLOT.unpack_from(
+                self._map, self._index + i * SLOT.size
+            )
+            if number == EMPTY:
+                return None
+            if slot_hash == h and self._string(offset, length) == key:
+                return number
+            i = (i + 1) & mask
+            
+    def symbols(self):
+        """Get [(symbol, member number)] for every indexed symbol, sorted"""
+        result = []
+        for i in range(self.slot_count):
+            _, offset, length, _, number = SLOT.unpack_from(
+                self._map, self._index + i * SLOT.size
+            )
+            if number != EMPTY:
+                result.append((self._string(offset, length).decode('utf-8'), number))
+        return sorted(result)
+
+
+def test_archive():
+    """Test function for object archives"""
+    print("Testing object archive...")
+    
+    members = [
+        ('copy.obj', "H^COPY  ^001000^000003\nT^001000^03^03201F\nE^001000\n"),
+        ('rdrec.obj', "H^RDREC ^000000^000003\nD^BUFFER^000000^LENGTH^000003\n"
+                      "T^000000^03^4F0000\nE^000000\n"),
+        ('wrrec.obj', "H^WRREC ^000000^000003\nD^LENGTH^000000\n"
+                      "T^000000^03^4F0000\nE^000000\n"),
+    ]
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        filename = os.path.join(scratch, 'lib.sxa')
+        duplicates = build_archive(filename, members)
+        
+        with Archive(filename) as archive:
+            print(f"\nMembers: {archive.members()}")
+            print(f"Symbols: {archive.symbols()}")
+            print(f"Duplicates: {duplicates}")
+            
+            found = {symbol: archive.lookup(symbol)
+                     for symbol in ('COPY', 'BUFFER', 'LENGTH', 'WRREC', 'NOPE')}
+            print(f"Lookups: {found}")
+            
+            round_trip = all(archive.member_data(i) == text
+                             for i, (_, text) in enumerate(members))
+                             
+        # Extracting never writes outside the target directory
+        hostile = os.path.join(scratch, 'hostile.sxa')
+        build_archive(hostile, [('../escape.obj', "E^000000\n"), ('ok.obj', "E^000000\n")])
+        target = os.path.join(scratch, 'out')
+        status = main(['extract', hostile, '-C', target])
+        extracted = sorted(os.listdir(target))
+        escaped = os.path.exists(os.path.join(scratch, 'escape.obj'))
+        print(f"Hostile archive: exit {status}, extracted {extracted}, escaped {escaped}")
+        
+        # Names outside Latin-1 round-trip; text with no UTF-8 form is an error
+        wide = os.path.join(scratch, 'wide.sxa')
+        build_archive(wide, [('программа.obj', "H^ПРОГ  ^000000^000000\nE^000000\n")])
+        with Archive(wide) as archive:
+            wide_ok = (archive.member_name(0) == 'программа.obj'
+                       and archive.lookup('ПРОГ') == 0)
+        try:
+            build_archive(wide, [('bad\udcff.obj', "E^000000\n")])
+            rejected = False
+        except ValueError:
+            rejected = True
+        binary = os.path.join(scratch, 'binary.obj')
+        with open(binary, 'wb') as f:
+            f.write(b'H^\xff\xfe^000000^000000\n')
+        binary_status = main(['build', wide, binary])
+        print(f"Non-Latin-1 names: {wide_ok}, unencodable name rejected: {rejected}, "
+              f"non-UTF-8 object: exit {binary_status}")
+              
+    expected = {'COPY': 0, 'BUFFER': 1, 'LENGTH': 1, 'WRREC': 2, 'NOPE': None}
+    if (found == expected and round_trip and duplicates == [('LENGTH', 'wrrec.obj')]
+            and status == 1 and extracted == ['ok.obj'] and not escaped
+            and wide_ok and rejected and binary_status == 2):
+        print("\n✓ Object archive test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+def _run(args):
+    """Carry out a parsed archive command; returns the exit status"""
+    if args.command == 'build':
+        members = []
+        for path in args.objects:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    members.append((os.path.basename(path), f.read()))
+            except UnicodeDecodeError:
+                raise ValueError(f"{path}: not UTF-8 text") from None
+        for symbol, member in build_archive(args.archive, members):
+            print(f"Warning: {symbol} in {member} already defined; first definition kept")
+        print(f"{args.archive}: {len(members)} member(s)")
+        return 0
+        
+    with Archive(args.archive) as archive:
+        if args.command == 'list':
+            exported = {}
+            for symbol, number in archive.symbols():
+                exported.setdefault(number, []).append(symbol)
+            for number, (name, size) in enumerate(archive.members()):
+                print(f"{name:20s} {size:8d}  {' '.join(exported.get(number, []))}")
+                
+        elif args.command == 'extract':
+            numbers = range(len(archive))
+            if args.members:
+                numbers = []
+                for name in args.members:
+                    number = archive.find_member(name)
+                    if number is None:
+                        print(f"{name}: no such member")
+                        return 1
+                    numbers.append(number)
+            os.makedirs(args.directory, exist_ok=True)
+            unsafe = 0
+            for number in numbers:
+                name = archive.member_name(number)
+                if not is_safe_member_name(name):
+                    print(f"{name!r}: unsafe member name, not extracted", file=sys.stderr)
+                    unsafe += 1
+                    continue
+                path = os.path.join(args.directory, name)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(archive.member_data(number))
+                print(path)
+            return 1 if unsafe else 0
+            
+        elif args.command == 'lookup':
+            missing = 0
+            for symbol in args.symbols:
+                number = archive.lookup(symbol)
+                if number is None:
+                    print(f"{symbol}: not found")
+                    missing += 1
+                else:
+                    print(f"{symbol}: {archive.member_name(number)}")
+            return 1 if missing else 0
+            
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SIC/XE object library archives")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    build = commands.add_parser('build', help="Create an archive from object files")
+    build.add_argument('archive')
+    build.add_argument('objects', nargs='+')
+    
+    listing = commands.add_parser('list', help="List members and indexed symbols")
+    listing.add_argument('archive')
+    
+    extract = commands.add_parser('extract', help="Write members out as .obj files")
+    extract.add_argument('archive')
+    extract.add_argument('members', nargs='*', help="Member names (default: all)")
+    extract.add_argument('-C', dest='directory', default='.', help="Output directory")
+    
+    lookup = commands.add_parser('lookup', help="Find the member defining a symbol")
+    lookup.add_argument('archive')
+    lookup.add_argument('symbols', nargs='+')
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        return _run(args)
+    except (OSError, ValueError) as e:
+        # Unreadable files, text with no UTF-8 form, malformed archives
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    test_archive()
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+SIC/XE Assembler
+Runs the full pipeline: input processing, Pass 1, Pass 2 and output
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import os
+import sys
+import time
+
+from data_structures import OPTAB
+from input_processor import InputProcessor
+from pass1 import Pass1Assembler
+from pass2 import Pass2Assembler
+
+
+class AssemblyResult:
+    """Outcome of assembling one source file"""
+    
+    def __init__(self, source):
+        self.source = source
+        self.instructions = []
+        self.includes = set()    # Real paths of the files the source includes
+        self.pass1 = None
+        self.pass2 = None
+        self.object_file = None
+        self.listing_file = None
+        self.debug_file = None
+        self.write_errors = []   # Output files that could not be written
+        self.profile = None
+        self.elapsed = 0.0
+        
+    @property
+    def errors(self):
+        """Diagnostics from both passes, in order"""
+        errors = []
+        if self.pass1 is not None:
+            errors.extend(self.pass1.errors)
+        if self.pass2 is not None:
+            errors.extend(self.pass2.errors)
+        return errors
+        
+    @property
+    def suppressed(self):
+        """Diagnostics counted but not stored (over a pass's cap)"""
+        return sum(p.errors.suppressed for p in (self.pass1, self.pass2) if p is not None)
+        
+    @property
+    def ok(self):
+        """True if neither pass reported an error"""
+        return not any(
+            p is not None and p.errors.has_errors() for p in (self.pass1, self.pass2)
+        )
+        
+    def __repr__(self):
+        return f"AssemblyResult({self.source}, {len(self.errors)} diagnostics)"
+
+
+def default_output_name(source, extension='.obj'):
+    """input_name.asm -> input_name.obj"""
+    return os.path.splitext(source)[0] + extension
+
+
+def assemble_file(source, output=None, listing=None, optab=None, write_output=True,
+                  profile=False, jobs=1, debug=None, mapped=False):
+    """Assemble one source file and optionally write object/listing files
+    
+    output defaults to the source name with .obj. Pass an OPTAB to reuse
+    one across many files. With profile, a static cycle/size profile is
+    kept in result.profile and appended to the listing. jobs > 1 parses
+    the source in parallel (worthwhile for very large files only). debug
+    names a binary symbol/line file to write (see debugfile.py). mapped
+    indexes the source through mmap and decodes fields only when read.
+    """
+    start = time.perf_counter()
+    result = AssemblyResult(source)
+    optab = optab if optab is not None else OPTAB()
+    
+    # Lines are parsed lazily, so disabled IF blocks are never tokenised;
+    # with jobs > 1 they are tokenised up front across processes instead
+    processor = InputProcessor()
+    lines = processor.open_source(source, jobs, mapped)
+    
+    pass1 = Pass1Assembler(lines, optab)
+    symtab, littab, _ = pass1.process()
+    
+    pass2 = Pass2Assembler(pass1.instructions, symtab, littab, optab)
+    pass2.process()
+    
+    result.instructions = pass1.instructions
+    result.includes = processor.includes
+    result.pass1 = pass1
+    result.pass2 = pass2
+    
+    if profile:
+        from profiler import Profiler
+        
+        result.profile = Profiler(pass1.instructions, symtab, optab).analyse()
+        
+    if write_output:
+        from output_generator import OutputGenerator
+        
+        result.object_file = output if output else default_output_name(source)
+        result.listing_file = listing
+        generator = OutputGenerator()
+        generator.write_outputs(
+            result.object_file, result.instructions, symtab, pass2,
+            listing_filename=listing, xref=pass1.xref, profile=result.profile
+        )
+        result.write_errors.extend(generator.write_errors)
+        
+    if debug:
+        from output_generator import write_error
+        
+        result.debug_file = debug
+        try:
+            pass2.write_debug_file(debug, source)
+        except (OSError, ValueError) as e:
+            result.write_errors.append(write_error('debug', debug, e))
+            
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def print_symtab(symtab, file=None):
+    """Print the symbol table, sorted by name"""
+    print("\nSYMBOL   ADDRESS  KIND", file=file)
+    print("======   =======  ====", file=file)
+    for name, address in symtab.sorted_by_name():
+        kind = "R" if symtab.is_relative(name) else "A"
+        print(f"{name:8s} {address:06X}   {kind}", file=file)
+
+
+def print_code(instructions, file=None):
+    """Print every source line with its address and object code"""
+    print("\nLINE  LOC     OBJECT CODE  SOURCE", file=file)
+    for instr in instructions:
+        if instr.is_comment:
+            continue
+        print(f"{instr.line_num:4d}  {instr.address:05X}   {instr.object_code:12s} "
+              f"{instr.label:8s} {instr.mnemonic:8s} {instr.operand}", file=file)
+
+
+def main(argv=None):
+    """Command-line entry point; returns the exit status
+    
+    Only argparse and the passes are loaded for a check-only run
+    (--no-output); output, listing and profiling code is imported when
+    an option asks for it.
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="SIC/XE Two-Pass Assembler")
+    parser.add_argument('input', help="Assembly source file")
+    parser.add_argument('output', nargs='?', help=argparse.SUPPRESS)
+    parser.add_argument('-o', dest='object_file', metavar='OUTPUT',
+                        help="Output object file (default: input_name.obj)")
+    parser.add_argument('-l', '--listing', nargs='?', const='', metavar='FILE',
+                        help="Also write a listing (default: input_name.lst)")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Show detailed assembly process")
+    parser.add_argument('--symtab', action='store_true', help="Display symbol table")
+    parser.add_argument('--no-output', action='store_true',
+                        help="Run assembler without generating object file (checking only)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Append a static cycle/size profile to the listing "
+                             "(printed if there is none)")
+    parser.add_argument('-g', '--debug', nargs='?', const='', metavar='FILE',
+                        help="Also write a binary debug file (default: input_name.dbg)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="Parse the source in this many processes")
+    parser.add_argument('--isa', metavar='SPEC',
+                        help="Load the instruction set from a JSON/TOML spec (see sicxe.json)")
+    parser.add_argument('--mmap', action='store_true',
+                        help="Index the source through mmap instead of reading it")
+    args = parser.parse_args(argv)
+    if args.no_output and args.listing is not None:
+        parser.error("-l/--listing writes a file, so it cannot be combined with --no-output")
+        
+    listing = args.listing
+    if listing == '':
+        listing = default_output_name(args.input, '.lst')
+    debug = args.debug
+    if debug == '':
+        debug = default_output_name(args.input, '.dbg')
+        
+    try:
+        optab = OPTAB.from_spec(args.isa) if args.isa else None
+        result = assemble_file(
+            args.input, output=args.object_file or args.output, listing=listing,
+            optab=optab, write_output=not args.no_output, profile=args.profile,
+            jobs=args.jobs, debug=debug, mapped=args.mmap
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+        
+    if args.verbose:
+        print_code(result.instructions)
+    if args.verbose or args.symtab:
+        print_symtab(result.pass1.symtab)
+    if result.profile is not None and not result.listing_file:
+        # No listing to append it to
+        print('\n'.join(result.profile.report_lines()))
+        
+    for error in result.errors:
+        print(error, file=sys.stderr)
+    if result.suppressed:
+        print(f"... {result.suppressed} more diagnostic(s) not shown", file=sys.stderr)
+    if result.write_errors:
+        for message in result.write_errors:
+            print(message, file=sys.stderr)
+        return 2
+        
+    if args.verbose or not args.no_output:
+        written = [name for name in (result.object_file, result.listing_file,
+                                     result.debug_file) if name]
+        status = "assembled" if result.ok else "assembled with errors"
+        target = f" -> {', '.join(written)}" if written else ""
+        print(f"{args.input}: {status}{target} ({result.elapsed * 1000:.1f} ms)")
+        
+    return 0 if result.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Constant Encoding for SIC/XE Assembler
+Shared BYTE/WORD/literal encoding used by Pass 1, Pass 2 and LITTAB
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+# Number of distinct operand texts remembered by each encoder
+CACHE_SIZE = 4096
+
+# length in bytes, raw bytes, and uppercase hex object code
+Constant = namedtuple('Constant', ['length', 'data', 'hex'])
+
+
+def _make(data):
+    """Build a Constant from raw bytes"""
+    return Constant(len(data), data, data.hex().upper())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def encode_byte(operand):
+    """Encode a BYTE operand: C'EOF', X'F1' or a decimal 0-255
+    
+    Returns a Constant, or None if the operand is malformed.
+    """
+    if len(operand) >= 3 and operand[1] == "'" and operand[-1] == "'":
+        kind = operand[0].upper()
+        content = operand[2:-1]
+        
+        if kind == 'C':
+            # Character constant: one byte per character
+            try:
+                return _make(content.encode('latin-1'))
+            except UnicodeEncodeError:
+                return None
+                
+        if kind == 'X':
+            # Hex constant: 2 hex digits = 1 byte (odd length is left-padded)
+            if len(content) % 2:
+                content = '0' + content
+            try:
+                return _make(bytes.fromhex(content))
+            except ValueError:
+                return None
+                
+        return None
+        
+    if operand.isdigit() and int(operand) <= 0xFF:
+        return _make(bytes((int(operand),)))
+        
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def encode_word(operand):
+    """Encode a decimal WORD operand as 3 bytes (two's complement)
+    
+    Returns a Constant, or None if the operand is not a number.
+    """
+    try:
+        value = int(operand)
+    except ValueError:
+        return None
+        
+    if not -(1 << 23) <= value < (1 << 24):
+        return None
+    return _make((value & 0xFFFFFF).to_bytes(3, 'big'))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def encode_literal(literal):
+    """Encode a literal: =C'EOF', =X'05' or =decimal (one word)
+    
+    Returns a Constant, or None if the literal is malformed.
+    """
+    body = literal[1:] if literal.startswith('=') else literal
+    
+    if body[:2].upper() in ("C'", "X'"):
+        return encode_byte(body)
+    return encode_word(body)
+
+
+def clear_caches():
+    """Drop all memoised encodings"""
+    encode_byte.cache_clear()
+    encode_word.cache_clear()
+    encode_literal.cache_clear()
+
+
+def test_constants():
+    """Test function for constant encoding"""
+    print("Testing constant encoding...")
+    
+    cases = [
+        (encode_byte, "C'EOF'", '454F46'),
+        (encode_byte, "X'F1'", 'F1'),
+        (encode_byte, "X'ABC'", '0ABC'),
+        (encode_word, "-1", 'FFFFFF'),
+        (encode_word, "4096", '001000'),
+        (encode_literal, "=C'A'", '41'),
+        (encode_literal, "=X'05'", '05'),
+        (encode_literal, "=3", '000003'),
+    ]
+    
+    failed = 0
+    for encoder, operand, expected in cases:
+        result = encoder(operand)
+        status = "✓" if result and result.hex == expected else "✗"
+        if status == "✗":
+            failed += 1
+        print(f"  {status} {encoder.__name__}({operand}) = {result.hex if result else None}")
+        
+    for _ in range(1000):
+        encode_byte("C'EOF'")
+    print(f"\n  encode_byte cache: {encode_byte.cache_info()}")
+    
+    if not failed and encode_byte("Q'1'") is None:
+        print("\n✓ Constant encoding test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+if __name__ == '__main__':
+    test_constants()
\ No newline at end of file
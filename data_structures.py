@@ -1,16 +1,70 @@
 """
 Data Structures for SIC/XE Assembler
-Contains: OPTAB, SYMTAB, LITTAB, Instruction class
+Contains: OPTAB, SYMTAB, SortedSYMTAB, XREF, LITTAB, Instruction class
 
 Team: Ilyas, Nadja
 """
 
+import bisect
+import os
+from enum import IntEnum
+
+from constants import encode_literal
+
+
+class AddressingMode(IntEnum):
+    """Format 3/4 operand addressing modes (select the n, i and x flags)"""
+    SIMPLE = 0
+    IMMEDIATE = 1
+    INDIRECT = 2
+    INDEXED = 3
+
+
+# (ni, x) flag bits for each addressing mode
+MODE_FLAGS = {
+    AddressingMode.SIMPLE: (0b11, 0),
+    AddressingMode.IMMEDIATE: (0b01, 0),
+    AddressingMode.INDIRECT: (0b10, 0),
+    AddressingMode.INDEXED: (0b11, 1),
+}
+
+
+def classify_operand(operand):
+    """Split a Format 3/4 operand into (mode, target, is_literal)
+    
+    target is a symbol name, the literal text (is_literal True), an int
+    for numeric constants, or None when there is no operand.
+    """
+    if not operand:
+        return AddressingMode.SIMPLE, None, False
+        
+    mode = AddressingMode.SIMPLE
+    first = operand[0]
+    if first == '#':
+        mode = AddressingMode.IMMEDIATE
+        operand = operand[1:]
+    elif first == '@':
+        mode = AddressingMode.INDIRECT
+        operand = operand[1:]
+        
+    parts = operand.split(',')
+    target = parts[0].strip()
+    if (mode == AddressingMode.SIMPLE and len(parts) > 1
+            and parts[1].strip().upper() == 'X'):
+        mode = AddressingMode.INDEXED
+        
+    if target.startswith('='):
+        return mode, target, True
+    if target.isdigit():
+        return mode, int(target), False
+    return mode, target, False
+
 
 class Instruction:
     """Represents a single line of assembly code"""
     
     def __init__(self, line_num=0, line=""):
-        self.line_num = line_num
+        self.line_num = line_num  # Line within source_file
         self.original_line = line
         self.address = 0
         self.label = ""
@@ -21,7 +75,21 @@ class Instruction:
         self.is_directive = False
         self.format = 0
         self.object_code = ""
-        self.error = ""
+        self.error = ""  # Why an INCLUDE/COPY line could not be expanded
+        # Set once Pass 1 has reported the line, so Pass 2 does not again
+        self.reported = False
+        # Operand classification (Format 3/4), filled in by Pass 1
+        self.addr_mode = None
+        self.target = None
+        self.is_literal = False
+        # LITTAB entry used by this instruction's literal operand
+        self.literal_entry = None
+        # Literal entries placed at this LTORG/END
+        self.literal_pool = None
+        # BASE range in effect (Format 3/4), or declared (BASE), from Pass 1
+        self.base_range = None
+        # Included file this line came from (None: the main source file)
+        self.source_file = None
         
     def __repr__(self):
         return f"Instruction({self.line_num}, {self.label}, {self.mnemonic}, {self.operand})"
@@ -30,76 +98,52 @@ class Instruction:
 class OPTAB:
     """Operation Code Table - stores instruction information"""
     
-    def __init__(self):
-        # Format: mnemonic: (opcode, format)
-        self.table = {
-            # Format 3/4 instructions
-            'ADD': (0x18, 3),
-            'ADDF': (0x58, 3),
-            'ADDR': (0x90, 2),
-            'AND': (0x40, 3),
-            'CLEAR': (0xB4, 2),
-            'COMP': (0x28, 3),
-            'COMPF': (0x88, 3),
-            'COMPR': (0xA0, 2),
-            'DIV': (0x24, 3),
-            'DIVF': (0x64, 3),
-            'DIVR': (0x9C, 2),
-            'FIX': (0xC4, 1),
-            'FLOAT': (0xC0, 1),
-            'HIO': (0xF4, 1),
-            'J': (0x3C, 3),
-            'JEQ': (0x30, 3),
-            'JGT': (0x34, 3),
-            'JLT': (0x38, 3),
-            'JSUB': (0x48, 3),
-            'LDA': (0x00, 3),
-            'LDB': (0x68, 3),
-            'LDCH': (0x50, 3),
-            'LDF': (0x70, 3),
-            'LDL': (0x08, 3),
-            'LDS': (0x6C, 3),
-            'LDT': (0x74, 3),
-            'LDX': (0x04, 3),
-            'LPS': (0xD0, 3),
-            'MUL': (0x20, 3),
-            'MULF': (0x60, 3),
-            'MULR': (0x98, 2),
-            'NORM': (0xC8, 1),
-            'OR': (0x44, 3),
-            'RD': (0xD8, 3),
-            'RMO': (0xAC, 2),
-            'RSUB': (0x4C, 3),
-            'SHIFTL': (0xA4, 2),
-            'SHIFTR': (0xA8, 2),
-            'SIO': (0xF0, 1),
-            'SSK': (0xEC, 3),
-            'STA': (0x0C, 3),
-            'STB': (0x78, 3),
-            'STCH': (0x54, 3),
-            'STF': (0x80, 3),
-            'STI': (0xD4, 3),
-            'STL': (0x14, 3),
-            'STS': (0x7C, 3),
-            'STSW': (0xE8, 3),
-            'STT': (0x84, 3),
-            'STX': (0x10, 3),
-            'SUB': (0x1C, 3),
-            'SUBF': (0x5C, 3),
-            'SUBR': (0x94, 2),
-            'SVC': (0xB0, 2),
-            'TD': (0xE0, 3),
-            'TIO': (0xF8, 1),
-            'TIX': (0x2C, 3),
-            'TIXR': (0xB8, 2),
-            'WD': (0xDC, 3),
-        }
+    def __init__(self, table=None, directives=None, registers=None,
+                 format_sizes=None, cycles=None):
+        if table is not None:
+            self._init_tables(table, directives, registers, format_sizes, cycles)
+            return
+            
+        # Built-in instruction set: a copy, so changing one OPTAB (a variant
+        # mnemonic, say) does not change every later one in the process
+        self._init_tables(dict(OPCODES), directives, registers, format_sizes, cycles)
+        
+    def _init_tables(self, table, directives, registers, format_sizes, cycles=None):
+        """Set up tables shared by the built-in and spec-loaded instruction sets"""
+        self.table = table
         
         # Directives
-        self.directives = {
-            'START', 'END', 'BYTE', 'WORD', 'RESB', 'RESW',
-            'BASE', 'NOBASE', 'LTORG', 'EQU', 'ORG', 'USE'
-        }
+        self.directives = directives if directives is not None else DIRECTIVES
+        
+        # Register codes for Format 2 instructions
+        self.registers = registers if registers is not None else dict(REGISTERS)
+        
+        # Instruction size in bytes for each format
+        self.format_sizes = format_sizes if format_sizes is not None else dict(FORMAT_SIZES)
+        
+        # Estimated execution cost: cycles per format plus per-mnemonic extras
+        self.format_cycles = dict(FORMAT_CYCLES)
+        self.mnemonic_cycles = dict(MNEMONIC_CYCLES)
+        if cycles:
+            self.format_cycles = {**FORMAT_CYCLES, **cycles.get('formats', {})}
+            self.mnemonic_cycles = {**MNEMONIC_CYCLES, **cycles.get('instructions', {})}
+            
+        # Built on first use by get_reverse_table()
+        self._reverse_table = None
+        
+    @classmethod
+    def from_spec(cls, spec_path, use_cache=True):
+        """Create an OPTAB from a JSON/TOML instruction set spec"""
+        from instruction_set import load_instruction_set
+        
+        compiled = load_instruction_set(spec_path, use_cache)
+        return cls(
+            compiled['instructions'],
+            compiled['directives'] or None,
+            compiled['registers'] or None,
+            compiled['format_sizes'],
+            compiled.get('cycles')
+        )
         
     def get_opcode(self, mnemonic):
         """Get opcode for a mnemonic"""
@@ -119,6 +163,26 @@ class OPTAB:
             return self.table[clean_mnemonic][1]
         return 0
         
+    def get_size(self, format_num):
+        """Get instruction length in bytes for a format"""
+        return self.format_sizes.get(format_num, format_num)
+        
+    def get_register_code(self, register):
+        """Get numeric code for a register"""
+        return self.registers.get(register.upper(), None)
+        
+    def get_cycles(self, mnemonic, format_num, indirect=False):
+        """Estimated cycles to execute one instruction
+        
+        Format cost plus any extra for the mnemonic; indirect addressing
+        adds one memory access.
+        """
+        cycles = self.format_cycles.get(format_num, format_num)
+        cycles += self.mnemonic_cycles.get(mnemonic.lstrip('+'), 0)
+        if indirect:
+            cycles += MEMORY_ACCESS_CYCLES
+        return cycles
+        
     def is_valid_instruction(self, mnemonic):
         """Check if mnemonic is valid"""
         clean_mnemonic = mnemonic.lstrip('+')
@@ -127,6 +191,23 @@ class OPTAB:
     def is_directive(self, mnemonic):
         """Check if mnemonic is a directive"""
         return mnemonic.upper() in self.directives
+        
+    def get_reverse_table(self):
+        """Get 256-entry list mapping a first object code byte to (mnemonic, format)
+        
+        Format 3/4 opcodes occupy all four slots that differ only in the
+        n and i bits. Unused slots are None.
+        """
+        if self._reverse_table is None:
+            reverse = [None] * 256
+            for mnemonic, (opcode, format_num) in self.table.items():
+                if format_num == 3:
+                    for ni in range(4):
+                        reverse[opcode | ni] = (mnemonic, format_num)
+                else:
+                    reverse[opcode] = (mnemonic, format_num)
+            self._reverse_table = reverse
+        return self._reverse_table
 
 
 class SYMTAB:
@@ -134,14 +215,25 @@ class SYMTAB:
     
     def __init__(self):
         self.symbols = {}
+        self.absolute = set()  # Symbols holding a constant rather than an address
         
-    def add_symbol(self, label, address):
-        """Add a symbol to the table"""
+    def add_symbol(self, label, address, relative=True):
+        """Add a symbol to the table
+        
+        relative is False for symbols whose value does not move when the
+        program is relocated (EQU constants).
+        """
         if label in self.symbols:
             return False  # Duplicate symbol
         self.symbols[label] = address
+        if not relative:
+            self.absolute.add(label)
         return True
         
+    def is_relative(self, symbol):
+        """Check if symbol is defined and its value needs relocation"""
+        return symbol in self.symbols and symbol not in self.absolute
+        
     def get_address(self, symbol):
         """Get address of a symbol"""
         return self.symbols.get(symbol, None)
@@ -150,6 +242,14 @@ class SYMTAB:
         """Check if symbol exists"""
         return symbol in self.symbols
         
+    def sorted_by_name(self):
+        """Get list of (symbol, address) pairs ordered by name"""
+        return sorted(self.symbols.items())
+        
+    def sorted_by_address(self):
+        """Get list of (symbol, address) pairs ordered by address"""
+        return sorted(self.symbols.items(), key=lambda item: (item[1], item[0]))
+        
     def __len__(self):
         return len(self.symbols)
         
@@ -157,31 +257,223 @@ class SYMTAB:
         return f"SYMTAB({len(self.symbols)} symbols)"
 
 
+class SortedSYMTAB(SYMTAB):
+    """Symbol Table kept ordered by name and by address
+    
+    Same interface as SYMTAB, plus prefix completion, nearest-symbol and
+    address range queries. The orderings are maintained with bisect on
+    insert, so queries never need to re-sort the table.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._names = []           # Symbol names in sorted order
+        self._addresses = []       # Symbol addresses in sorted order
+        self._address_names = []   # Names parallel to _addresses
+        
+    def add_symbol(self, label, address, relative=True):
+        """Add a symbol to the table"""
+        if not super().add_symbol(label, address, relative):
+            return False
+            
+        bisect.insort(self._names, label)
+        
+        i = bisect.bisect_right(self._addresses, address)
+        self._addresses.insert(i, address)
+        self._address_names.insert(i, label)
+        return True
+        
+    def complete(self, prefix):
+        """Get sorted list of symbols starting with prefix"""
+        lo = bisect.bisect_left(self._names, prefix)
+        hi = bisect.bisect_left(self._names, prefix + '\U0010FFFF', lo)
+        return self._names[lo:hi]
+        
+    def nearest(self, address):
+        """Get (symbol, address) of the closest symbol at or below address"""
+        i = bisect.bisect_right(self._addresses, address)
+        if i == 0:
+            return None
+        return self._address_names[i - 1], self._addresses[i - 1]
+        
+    def in_range(self, start, end):
+        """Get (symbol, address) pairs with start <= address < end"""
+        lo = bisect.bisect_left(self._addresses, start)
+        hi = bisect.bisect_left(self._addresses, end, lo)
+        return list(zip(self._address_names[lo:hi], self._addresses[lo:hi]))
+        
+    def sorted_by_name(self):
+        """Get list of (symbol, address) pairs ordered by name"""
+        return [(name, self.symbols[name]) for name in self._names]
+        
+    def sorted_by_address(self):
+        """Get list of (symbol, address) pairs ordered by address"""
+        return list(zip(self._address_names, self._addresses))
+        
+    def __repr__(self):
+        return f"SortedSYMTAB({len(self.symbols)} symbols)"
+
+
+class XREF:
+    """Cross-reference index - where each symbol is defined and referenced"""
+    
+    # Addressing modes recorded with each reference
+    SIMPLE = AddressingMode.SIMPLE
+    IMMEDIATE = AddressingMode.IMMEDIATE
+    INDIRECT = AddressingMode.INDIRECT
+    INDEXED = AddressingMode.INDEXED
+    
+    # Short markers used in the listing cross-reference section
+    MARKERS = {
+        AddressingMode.SIMPLE: '',
+        AddressingMode.IMMEDIATE: '#',
+        AddressingMode.INDIRECT: '@',
+        AddressingMode.INDEXED: 'X',
+    }
+    
+    def __init__(self):
+        # Format: {symbol: (source_file, line_num)}
+        self.definitions = {}
+        # Format: {symbol: [((source_file, line_num), mode), ...]}
+        self.references = {}
+        # source_file is None for lines of the main source
+        
+    def add_definition(self, symbol, line_num, source_file=None):
+        """Record the line that defines a symbol (first definition wins)"""
+        if symbol not in self.definitions:
+            self.definitions[symbol] = (source_file, line_num)
+            
+    def add_reference(self, symbol, line_num, mode=SIMPLE, source_file=None):
+        """Record a line that references a symbol"""
+        refs = self.references.get(symbol)
+        if refs is None:
+            self.references[symbol] = [((source_file, line_num), mode)]
+        else:
+            refs.append(((source_file, line_num), mode))
+            
+    def get_definition(self, symbol):
+        """Get the defining (source_file, line_num) of a symbol"""
+        return self.definitions.get(symbol, None)
+        
+    def get_references(self, symbol):
+        """Get list of ((source_file, line_num), mode) references to a symbol"""
+        return self.references.get(symbol, [])
+        
+    @staticmethod
+    def format_location(location):
+        """'12' for a main source line, 'header.asm:3' for an included one"""
+        source_file, line_num = location
+        if source_file is None:
+            return str(line_num)
+        return f"{os.path.basename(source_file)}:{line_num}"
+        
+    def get_undefined(self):
+        """Get symbols that are referenced but never defined"""
+        return [symbol for symbol in self.references
+                if symbol not in self.definitions]
+                
+    def get_unreferenced(self):
+        """Get symbols that are defined but never referenced"""
+        return [symbol for symbol in self.definitions
+                if symbol not in self.references]
+                
+    def symbols(self):
+        """Get all known symbols (defined or referenced)"""
+        result = set(self.definitions)
+        result.update(self.references)
+        return result
+        
+    def __len__(self):
+        return len(self.symbols())
+        
+    def __repr__(self):
+        return f"XREF({len(self.definitions)} definitions, " \
+               f"{sum(len(r) for r in self.references.values())} references)"
+
+
 class LITTAB:
-    """Literal Table - stores literals and their addresses"""
+    """Literal Table - stores literals and their addresses
+    
+    Literals are placed in pools at each LTORG (and at END). Inside the
+    pool being collected, literals with the same bytes share one entry
+    (=C'EOF' and =X'454F46' are stored once). A value already placed in an
+    earlier pool is reused only if the referencing instruction can still
+    reach it with PC-relative addressing (or is Format 4); otherwise it is
+    placed again in the current pool.
+    """
     
     def __init__(self):
-        # Format: {literal_string: {'value': int, 'address': int, 'length': int}}
+        # Format: {literal_string: entry} where entry is
+        # {'literal': str, 'value': int, 'address': int, 'length': int, 'data': bytes}
+        # (the most recent entry bound to that literal text)
         self.literals = {}
-        self.pending_literals = []  # Literals not yet assigned addresses
-        
-    def add_literal(self, literal):
-        """Add a literal (without address initially)"""
-        if literal not in self.literals:
-            value, length = self._parse_literal(literal)
-            self.literals[literal] = {
-                'value': value,
+        self.pending_literals = []  # Entries not yet assigned addresses
+        self.pools = []             # Placed pools: lists of entries
+        self._pending_by_data = {}  # data -> pending entry (current pool)
+        self._placed_by_data = {}   # data -> placed entries, oldest first
+        
+    def add_literal(self, literal, ref_address=None, ref_format=3):
+        """Add a literal reference, returning its entry (None if malformed)
+        
+        ref_address/ref_format describe the referencing instruction and
+        decide whether a copy in an earlier pool is still reachable.
+        """
+        constant = encode_literal(literal)
+        if constant is None:
+            return None
+            
+        data = constant.data
+        entry = self._pending_by_data.get(data)
+        
+        if entry is None and ref_address is not None:
+            for placed in reversed(self._placed_by_data.get(data, ())):
+                if self._reachable(placed['address'], ref_address, ref_format):
+                    entry = placed
+                    break
+                    
+        if entry is None:
+            entry = {
+                'literal': literal,
+                'value': int.from_bytes(data, 'big'),
                 'address': None,
-                'length': length
+                'length': constant.length,
+                'data': data
             }
-            self.pending_literals.append(literal)
+            self._pending_by_data[data] = entry
+            self.pending_literals.append(entry)
+            
+        self.literals[literal] = entry
+        return entry
+        
+    def _reachable(self, address, ref_address, ref_format):
+        """Check if a Format 3/4 instruction at ref_address can address a literal"""
+        if ref_format == 4:
+            return True
+        disp = address - (ref_address + 3)
+        return -2048 <= disp <= 2047
+        
+    def place_pending(self, address):
+        """Place the pending pool at address, returning (entries, end_address)"""
+        pool = self.pending_literals
+        for entry in pool:
+            entry['address'] = address
+            address += entry['length']
+            self._placed_by_data.setdefault(entry['data'], []).append(entry)
             
+        if pool:
+            self.pools.append(pool)
+        self.pending_literals = []
+        self._pending_by_data = {}
+        return pool, address
+        
     def assign_address(self, literal, address):
         """Assign address to a literal"""
-        if literal in self.literals:
-            self.literals[literal]['address'] = address
-            if literal in self.pending_literals:
-                self.pending_literals.remove(literal)
+        entry = self.literals.get(literal)
+        if entry is not None:
+            entry['address'] = address
+            if entry in self.pending_literals:
+                self.pending_literals.remove(entry)
+                self._pending_by_data.pop(entry['data'], None)
                 
     def get_address(self, literal):
         """Get address of a literal"""
@@ -201,39 +493,24 @@ class LITTAB:
             return self.literals[literal]['length']
         return 0
         
+    def get_data(self, literal):
+        """Get encoded bytes of a literal"""
+        if literal in self.literals:
+            return self.literals[literal]['data']
+        return None
+        
     def has_pending(self):
         """Check if there are pending literals"""
         return len(self.pending_literals) > 0
         
     def get_pending(self):
-        """Get list of pending literals"""
-        return self.pending_literals.copy()
-        
-    def _parse_literal(self, literal):
-        """Parse literal to get value and length"""
-        # Remove leading =
-        literal = literal[1:]
-        
-        if literal.startswith('C'):
-            # Character literal: =C'EOF'
-            content = literal[2:-1]  # Remove C' and '
-            value = 0
-            for char in content:
-                value = (value << 8) | ord(char)
-            return value, len(content)
-            
-        elif literal.startswith('X'):
-            # Hex literal: =X'05'
-            content = literal[2:-1]  # Remove X' and '
-            value = int(content, 16)
-            length = (len(content) + 1) // 2  # 2 hex digits = 1 byte
-            return value, length
-            
-        else:
-            # Assume decimal
-            value = int(literal)
-            return value, 3
-            
+        """Get list of pending literal strings"""
+        return [entry['literal'] for entry in self.pending_literals]
+        
+    def pool_size(self):
+        """Total bytes of literal data placed in all pools"""
+        return sum(entry['length'] for pool in self.pools for entry in pool)
+        
     def __len__(self):
         return len(self.literals)
         
@@ -241,6 +518,92 @@ class LITTAB:
         return f"LITTAB({len(self.literals)} literals)"
 
 
+# Built-in instruction set, shared by every default OPTAB
+# Format: mnemonic: (opcode, format)
+OPCODES = {
+    # Format 3/4 instructions
+    'ADD': (0x18, 3),
+    'ADDF': (0x58, 3),
+    'ADDR': (0x90, 2),
+    'AND': (0x40, 3),
+    'CLEAR': (0xB4, 2),
+    'COMP': (0x28, 3),
+    'COMPF': (0x88, 3),
+    'COMPR': (0xA0, 2),
+    'DIV': (0x24, 3),
+    'DIVF': (0x64, 3),
+    'DIVR': (0x9C, 2),
+    'FIX': (0xC4, 1),
+    'FLOAT': (0xC0, 1),
+    'HIO': (0xF4, 1),
+    'J': (0x3C, 3),
+    'JEQ': (0x30, 3),
+    'JGT': (0x34, 3),
+    'JLT': (0x38, 3),
+    'JSUB': (0x48, 3),
+    'LDA': (0x00, 3),
+    'LDB': (0x68, 3),
+    'LDCH': (0x50, 3),
+    'LDF': (0x70, 3),
+    'LDL': (0x08, 3),
+    'LDS': (0x6C, 3),
+    'LDT': (0x74, 3),
+    'LDX': (0x04, 3),
+    'LPS': (0xD0, 3),
+    'MUL': (0x20, 3),
+    'MULF': (0x60, 3),
+    'MULR': (0x98, 2),
+    'NORM': (0xC8, 1),
+    'OR': (0x44, 3),
+    'RD': (0xD8, 3),
+    'RMO': (0xAC, 2),
+    'RSUB': (0x4C, 3),
+    'SHIFTL': (0xA4, 2),
+    'SHIFTR': (0xA8, 2),
+    'SIO': (0xF0, 1),
+    'SSK': (0xEC, 3),
+    'STA': (0x0C, 3),
+    'STB': (0x78, 3),
+    'STCH': (0x54, 3),
+    'STF': (0x80, 3),
+    'STI': (0xD4, 3),
+    'STL': (0x14, 3),
+    'STS': (0x7C, 3),
+    'STSW': (0xE8, 3),
+    'STT': (0x84, 3),
+    'STX': (0x10, 3),
+    'SUB': (0x1C, 3),
+    'SUBF': (0x5C, 3),
+    'SUBR': (0x94, 2),
+    'SVC': (0xB0, 2),
+    'TD': (0xE0, 3),
+    'TIO': (0xF8, 1),
+    'TIX': (0x2C, 3),
+    'TIXR': (0xB8, 2),
+    'WD': (0xDC, 3),
+}
+
+DIRECTIVES = frozenset({
+    'START', 'END', 'BYTE', 'WORD', 'RESB', 'RESW',
+    'BASE', 'NOBASE', 'LTORG', 'EQU', 'ORG', 'USE',
+    'IF', 'ELSE', 'ENDIF'
+})
+
+# Instruction size in bytes for each format
+FORMAT_SIZES = {1: 1, 2: 2, 3: 3, 4: 4}
+
+# Static cost model used by the profiler: cycles to fetch and execute an
+# instruction of each format, plus extra cycles for slow operations
+FORMAT_CYCLES = {1: 1, 2: 2, 3: 3, 4: 4}
+MEMORY_ACCESS_CYCLES = 1
+MNEMONIC_CYCLES = {
+    'MUL': 6, 'MULR': 5, 'DIV': 18, 'DIVR': 17,
+    'ADDF': 4, 'SUBF': 4, 'COMPF': 2, 'MULF': 10, 'DIVF': 24,
+    'FIX': 2, 'FLOAT': 2, 'NORM': 2,
+    'RD': 20, 'WD': 20, 'TD': 8,
+    'SIO': 10, 'HIO': 10, 'TIO': 10, 'SVC': 10,
+}
+
 # Register codes for Format 2 instructions
 REGISTERS = {
     'A': 0,
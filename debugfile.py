@@ -0,0 +1,329 @@
+"""
+Debug Information File for SIC/XE Assembler
+Binary symbol and address-to-line tables that debuggers can search in place
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import mmap
+import struct
+import sys
+
+from fileutil import atomic_write
+
+# File layout (all integers little-endian):
+#   header | file table | symbol table | line table | string table
+# Symbols and lines are sorted by address, so both can be binary searched
+# straight from the mapped file.
+MAGIC = b'SXDB'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHIIIIIIIIII')  # magic, version, 0, files, symbols, lines, file table,
+                                           # symbol table, line table, strings, strings size,
+                                           # program name offset, name length
+FILE = struct.Struct('<IHH')               # name offset, name length, 0
+SYMBOL = struct.Struct('<IIHBB')           # address, name offset, name length, kind, section
+LINE = struct.Struct('<IIHH')              # address, line number, file number, size in bytes
+
+# Symbol kinds
+KIND_LABEL = 0      # Relative: an address in the program
+KIND_ABSOLUTE = 1   # EQU constant
+KIND_LITERAL = 2    # Literal pool entry, named by its literal text
+
+KIND_NAMES = {KIND_LABEL: 'label', KIND_ABSOLUTE: 'absolute', KIND_LITERAL: 'literal'}
+
+
+def write_debug_file(filename, instructions, symtab, littab=None, source=""):
+    """Write the debug file for a program after Pass 2
+    
+    source is the main source file name; lines from included files are
+    attributed to their own files. Every symbol is in section 0, the
+    program's single control section. Raises ValueError if something does
+    not fit the file's fields (a negative address, for one).
+    """
+    strings = bytearray()
+    string_offsets = {}
+    
+    def intern(name):
+        encoded = name.encode('utf-8')
+        if encoded not in string_offsets:
+            string_offsets[encoded] = len(strings)
+            strings.extend(encoded)
+        return string_offsets[encoded], len(encoded)
+        
+    program_name = ""
+    files = [source]
+    file_numbers = {source: 0}
+    lines = []
+    
+    for instr in instructions:
+        if instr.is_comment:
+            continue
+        if instr.mnemonic == 'START' and not program_name:
+            program_name = instr.label
+        code = instr.object_code
+        if not code or code == "ERROR":
+            continue
+            
+        name = instr.source_file or source
+        number = file_numbers.get(name)
+        if number is None:
+            number = file_numbers[name] = len(files)
+            files.append(name)
+        lines.append((instr.address, instr.line_num, number, len(code) // 2))
+        
+    symbols = [
+        (address, name, KIND_LABEL if symtab.is_relative(name) else KIND_ABSOLUTE)
+        for name, address in symtab.sorted_by_address()
+    ]
+    if littab is not None:
+        for pool in littab.pools:
+            for entry in pool:
+                symbols.append((entry['address'], entry['literal'], KIND_LITERAL))
+                
+    symbols.sort(key=lambda symbol: (symbol[0], symbol[2], symbol[1]))
+    lines.sort(key=lambda line: (line[0], line[1]))
+    
+    name_offset, name_length = intern(program_name)
+    file_entries = [intern(name) for name in files]
+    symbol_entries = [(address, *intern(name), kind) for address, name, kind in symbols]
+    
+    file_table = HEADER.size
+    symbol_table = file_table + FILE.size * len(files)
+    line_table = symbol_table + SYMBOL.size * len(symbols)
+    string_table = line_table + LINE.size * len(lines)
+    
+    for address, line_num, _, _ in lines:
+        if not 0 <= address <= 0xFFFFFFFF:
+            raise ValueError(f"line {line_num}: address {address:X} cannot be stored "
+                             f"in a debug file")
+                             
+    try:
+        out = bytearray(HEADER.pack(
+            MAGIC, VERSION, 0, len(files), len(symbols), len(lines),
+            file_table, symbol_table, line_table, string_table, len(strings),
+            name_offset, name_length
+        ))
+        for offset, length in file_entries:
+            out += FILE.pack(offset, length, 0)
+        for address, offset, length, kind in symbol_entries:
+            out += SYMBOL.pack(address & 0xFFFFFFFF, offset, length, kind, 0)
+        for address, line_num, number, size in lines:
+            out += LINE.pack(address, line_num, number, size)
+    except struct.error as e:
+        raise ValueError(f"cannot encode debug information: {e}")
+    out += strings
+    
+    atomic_write(filename, out)
+    return len(symbols), len(lines)
+
+
+class DebugInfo:
+    """Read-only view of a debug file through mmap
+    
+    Lookups by address are binary searches over the mapped tables; nothing
+    is decoded up front.
+    """
+    
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            
+        (magic, version, _, self.file_count, self.symbol_count, self.line_count,
+         self._files, self._symbols, self._lines, self._strings, _,
+         name_offset, name_length) = HEADER.unpack_from(self._map, 0)
+         
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename}: not a SIC/XE debug file")
+            
+        self.program_name = self._string(name_offset, name_length)
+        
+    def close(self):
+        self._map.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        
+    def _string(self, offset, length):
+        start = self._strings + offset
+        return self._map[start:start + length].decode('utf-8')
+        
+    def file_name(self, number):
+        offset, length, _ = FILE.unpack_from(self._map, self._files + number * FILE.size)
+        return self._string(offset, length)
+        
+    def _symbol(self, i):
+        address, offset, length, kind, section = SYMBOL.unpack_from(
+            self._map, self._symbols + i * SYMBOL.size
+        )
+        return self._string(offset, length), address, KIND_NAMES.get(kind, kind), section
+        
+    def _line(self, i):
+        return LINE.unpack_from(self._map, self._lines + i * LINE.size)
+        
+    def _search(self, count, address_at, address):
+        """Index of the last entry with address <= address, or -1"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if address_at(mid) <= address:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+        
+    def _symbol_address(self, i):
+        return struct.unpack_from('<I', self._map, self._symbols + i * SYMBOL.size)[0]
+        
+    def _line_address(self, i):
+        return struct.unpack_from('<I', self._map, self._lines + i * LINE.size)[0]
+        
+    def symbols(self):
+        """Get [(name, address, kind, section)] in address order"""
+        return [self._symbol(i) for i in range(self.symbol_count)]
+        
+    def nearest_symbol(self, address, kinds=('label',)):
+        """Get (name, address, kind, section) of the closest symbol at or below address
+        
+        Only symbols of the given kinds count, so EQU constants and
+        literals do not hide the label a PC is in.
+        """
+        i = self._search(self.symbol_count, self._symbol_address, address)
+        while i >= 0:
+            symbol = self._symbol(i)
+            if symbol[2] in kinds:
+                return symbol
+            i -= 1
+        return None
+        
+    def line_for(self, address):
+        """Get (file name, line number) of the code at address, or None"""
+        i = self._search(self.line_count, self._line_address, address)
+        if i < 0:
+            return None
+        start, line_num, number, size = self._line(i)
+        if address >= start + size:
+            return None  # In a gap (RESW/RESB) after the line
+        return self.file_name(number), line_num
+        
+    def address_of_line(self, line_num, file_name=None):
+        """Get the address of the first code generated by a source line, or None
+        
+        A linear scan: the table is ordered by address, not by line.
+        """
+        for i in range(self.line_count):
+            address, entry_line, number, _ = self._line(i)
+            if entry_line == line_num and (file_name is None
+                                            or self.file_name(number) == file_name):
+                return address
+        return None
+
+
+def test_debugfile():
+    """Test function for debug files"""
+    print("Testing debug file...")
+    
+    import os
+    import tempfile
+    from data_structures import OPTAB
+    from input_processor import InputProcessor
+    from pass1 import Pass1Assembler
+    from pass2 import Pass2Assembler
+    
+    lines = [
+        "PROG    START   1000",
+        "MAXLEN  EQU     4096",
+        "FIRST   LDA     =C'EOF'",
+        "LOOP    TIX     #3",
+        "        JLT     LOOP",
+        "        RSUB",
+        "BUFFER  RESB    100",
+        "DATA    WORD    5",
+        "        END     FIRST",
+    ]
+    processor = InputProcessor()
+    instructions = [processor.parse_line(line, i) for i, line in enumerate(lines, 1)]
+    
+    optab = OPTAB()
+    pass1 = Pass1Assembler(instructions, optab)
+    symtab, littab, _ = pass1.process()
+    pass2 = Pass2Assembler(pass1.instructions, symtab, littab, optab)
+    pass2.process()
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        filename = os.path.join(scratch, 'prog.dbg')
+        pass2.write_debug_file(filename, source='prog.asm')
+        
+        with DebugInfo(filename) as info:
+            print(f"\nProgram: {info.program_name}, {os.path.getsize(filename)} bytes")
+            for symbol in info.symbols():
+                print(f"  {symbol}")
+                
+            found = {
+                'line_1007': info.line_for(0x1007),
+                'gap': info.line_for(0x1010),
+                'data': info.line_for(0x1071),
+                'near_1008': info.nearest_symbol(0x1008)[0],
+                'line_4': info.address_of_line(4),
+            }
+            print(f"Lookups: {found}")
+            
+        # An address the file cannot hold is an error, not a struct.error
+        pass2.instructions[3].address = -1
+        try:
+            pass2.write_debug_file(os.path.join(scratch, 'bad.dbg'))
+            rejected = None
+        except ValueError as e:
+            rejected = str(e)
+        print(f"Negative address: {rejected}")
+        
+    expected = {
+        'line_1007': ('prog.asm', 5),
+        'gap': None,
+        'data': ('prog.asm', 8),
+        'near_1008': 'LOOP',
+        'line_4': 0x1003,
+    }
+    if found == expected and rejected is not None:
+        print("\n✓ Debug file test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Inspect SIC/XE debug files")
+    parser.add_argument('debugfile')
+    parser.add_argument('addresses', nargs='*',
+                        help="Hex addresses to map to symbol+offset and source line")
+    args = parser.parse_args(argv)
+    
+    with DebugInfo(args.debugfile) as info:
+        if not args.addresses:
+            print(f"Program {info.program_name}: {info.symbol_count} symbol(s), "
+                  f"{info.line_count} line(s)")
+            for name, address, kind, section in info.symbols():
+                print(f"{address:06X}  {kind:8s} {name}")
+            return 0
+            
+        for text in args.addresses:
+            address = int(text, 16)
+            symbol = info.nearest_symbol(address)
+            where = info.line_for(address)
+            label = f"{symbol[0]}+{address - symbol[1]:X}" if symbol else "?"
+            line = f"{where[0]}:{where[1]}" if where else "no code"
+            print(f"{address:06X}  {label:16s} {line}")
+            
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    test_debugfile()
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Diagnostics for SIC/XE Assembler
+Structured error and warning reporting shared by all passes
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Default number of diagnostics kept per pass; the rest are only counted
+DEFAULT_MAX_DIAGNOSTICS = 1000
+
+
+class Diagnostic:
+    """A single problem found in the source"""
+    
+    __slots__ = ('line_num', 'column', 'severity', 'code', 'message_format', 'args',
+                 'source')
+                 
+    def __init__(self, line_num, column, severity, code, message_format, args=(),
+                 source=None):
+        self.line_num = line_num
+        self.column = column
+        self.severity = severity
+        self.code = code
+        self.message_format = message_format
+        self.args = args
+        self.source = source  # Included file the line is in (None: main source)
+        
+    @property
+    def message(self):
+        """Message text (formatted only when asked for)"""
+        if self.args:
+            return self.message_format.format(*self.args)
+        return self.message_format
+        
+    def __str__(self):
+        location = f"Line {self.line_num}"
+        if self.source:
+            location = f"{self.source}: {location}"
+        if self.severity == WARNING:
+            return f"{location}: Warning: {self.message}"
+        return f"{location}: {self.message}"
+        
+    def __repr__(self):
+        return (f"Diagnostic({self.line_num}:{self.column}, {self.severity}, "
+                f"{self.code}, {self.message!r})")
+
+
+class DiagnosticList(list):
+    """List of Diagnostic objects with a storage cap
+    
+    Behaves like the plain error list used before (iteration, len, truth
+    value), but once max_diagnostics entries are stored further reports
+    are only counted. Messages are formatted lazily and the column is
+    found from instr and near only for stored reports, so reports past
+    the cap cost a comparison and an increment.
+    """
+    
+    def __init__(self, max_diagnostics=DEFAULT_MAX_DIAGNOSTICS):
+        super().__init__()
+        self.max_diagnostics = max_diagnostics
+        self.suppressed = 0
+        self.error_count = 0
+        self.warning_count = 0
+        
+    def report(self, severity, code, line_num, message_format, *args, column=0,
+               source=None, instr=None, near=None):
+        """Record a diagnostic, returning it (or None if over the cap)
+        
+        instr, if given, supplies the source file and (with near, the
+        offending text) the column.
+        """
+        if severity == ERROR:
+            self.error_count += 1
+        else:
+            self.warning_count += 1
+            
+        if len(self) >= self.max_diagnostics:
+            self.suppressed += 1
+            return None
+            
+        if instr is not None:
+            if near is not None:
+                column = column_of(instr, near)
+            if source is None:
+                source = instr.source_file
+                
+        diagnostic = Diagnostic(line_num, column, severity, code, message_format, args,
+                                source)
+        list.append(self, diagnostic)
+        return diagnostic
+        
+    def error(self, code, line_num, message_format, *args, column=0, source=None,
+              instr=None, near=None):
+        """Record an error"""
+        return self.report(ERROR, code, line_num, message_format, *args,
+                           column=column, source=source, instr=instr, near=near)
+                           
+    def warning(self, code, line_num, message_format, *args, column=0, source=None,
+                instr=None, near=None):
+        """Record a warning"""
+        return self.report(WARNING, code, line_num, message_format, *args,
+                           column=column, source=source, instr=instr, near=near)
+                           
+    @property
+    def full(self):
+        """True once the storage cap has been reached"""
+        return len(self) >= self.max_diagnostics
+        
+    def has_errors(self):
+        """Check if any error (not warning) was reported"""
+        return self.error_count > 0
+        
+    def errors_only(self):
+        """Get stored diagnostics with error severity"""
+        return [d for d in self if d.severity == ERROR]
+        
+    def summary(self):
+        """One-line summary including suppressed count"""
+        text = f"{self.error_count} error(s), {self.warning_count} warning(s)"
+        if self.suppressed:
+            text += f" ({self.suppressed} not shown)"
+        return text
+
+
+def column_of(instr, text):
+    """1-based column of text in an instruction's source line (0 if unknown)"""
+    if not text:
+        return 0
+    return instr.original_line.find(text) + 1
+
+
+def test_diagnostics():
+    """Test function for DiagnosticList"""
+    print("Testing Diagnostics...")
+    
+    diagnostics = DiagnosticList(max_diagnostics=3)
+    for line in range(1, 1001):
+        diagnostics.error('invalid-operand', line, "Invalid operand '{}'", line)
+    diagnostics.warning('unused-base', 5, "BASE never used")
+    
+    # Columns are only looked up for stored reports
+    class Line:
+        reads = 0
+        source_file = "inc.asm"
+        
+        @property
+        def original_line(self):
+            Line.reads += 1
+            return "        LDA     #Q"
+            
+    lazy = DiagnosticList(max_diagnostics=1)
+    for line in range(1, 101):
+        lazy.error('undefined-symbol', line, "Undefined symbol 'Q'", instr=Line(), near='Q')
+        
+    for diagnostic in diagnostics:
+        print(f"  {diagnostic}")
+    print(f"  {diagnostics.summary()}")
+    print(f"  {lazy[0]!r} in {lazy[0].source}, {Line.reads} column lookup(s)")
+    
+    if (len(diagnostics) == 3 and diagnostics.suppressed == 998
+            and Line.reads == 1 and lazy[0].column == 18 and lazy[0].source == "inc.asm"):
+        print("\n✓ Diagnostics test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+if __name__ == '__main__':
+    test_diagnostics()
\ No newline at end of file
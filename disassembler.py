@@ -0,0 +1,272 @@
+"""
+Disassembler for SIC/XE Assembler
+Decodes object programs back into annotated assembly
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+from segments import SegmentMap
+
+
+class Disassembler:
+    """Decodes H/T/M/E object records or raw binary images"""
+    
+    # Format 2 instructions that take a single register operand
+    ONE_REGISTER = {'CLEAR', 'TIXR'}
+    
+    # Format 2 instructions whose second operand is a count (n - 1 encoded)
+    SHIFTS = {'SHIFTL', 'SHIFTR'}
+    
+    def __init__(self, optab, symbols=None):
+        self.reverse = optab.get_reverse_table()
+        self.format_sizes = optab.format_sizes
+        self.register_names = {code: name for name, code in optab.registers.items()}
+        
+        # Address -> label map (first symbol wins for shared addresses)
+        self.labels = {}
+        if symbols is not None:
+            items = symbols.symbols.items() if hasattr(symbols, 'symbols') else symbols.items()
+            for name, address in items:
+                if address not in self.labels:
+                    self.labels[address] = name
+                    
+        self.program_name = ""
+        self.start_address = 0
+        self.program_length = 0
+        self.first_exec = 0
+        self.modifications = []
+        
+    def load_records(self, lines):
+        """Parse object records into a list of (start_address, bytes) segments
+        
+        Contiguous text records are merged so instructions that straddle a
+        record boundary decode correctly.
+        """
+        segments = SegmentMap()
+        self.modifications = []
+        
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+                
+            fields = line.split('^')
+            record_type = fields[0]
+            
+            if record_type == 'H':
+                self.program_name = fields[1].strip()
+                self.start_address = int(fields[2], 16)
+                self.program_length = int(fields[3], 16)
+                
+            elif record_type == 'T':
+                start = int(fields[1], 16)
+                try:
+                    data = bytes.fromhex(fields[3])
+                except ValueError:
+                    raise ValueError(f"Malformed text record: {line}")
+                segments.add(start, data)
+                
+            elif record_type == 'M':
+                self.modifications.append((int(fields[1], 16), int(fields[2], 16)))
+                
+            elif record_type == 'E':
+                self.first_exec = int(fields[1], 16) if len(fields) > 1 and fields[1] else 0
+                
+        return list(segments)
+        
+    def disassemble_records(self, lines):
+        """Disassemble object records, returning decoded entries"""
+        entries = []
+        for start, data in self.load_records(lines):
+            entries.extend(self.disassemble_image(data, start))
+        return entries
+        
+    def disassemble_file(self, filename):
+        """Disassemble an object file (.obj) written by OutputGenerator"""
+        with open(filename, 'r') as f:
+            return self.disassemble_records(f)
+            
+    def disassemble_image(self, data, start_address=0):
+        """Disassemble a binary image loaded at start_address
+        
+        Returns a list of (address, object_hex, label, mnemonic, operand)
+        tuples. Bytes that do not decode to an instruction are emitted as
+        one-byte BYTE constants.
+        """
+        reverse = self.reverse
+        labels = self.labels
+        hex_data = data.hex().upper()
+        entries = []
+        append = entries.append
+        size = len(data)
+        i = 0
+        
+        while i < size:
+            address = start_address + i
+            b0 = data[i]
+            entry = reverse[b0]
+            length = 1
+            mnemonic = None
+            operand = ""
+            
+            if entry is not None:
+                mnemonic, format_num = entry
+                
+                if format_num == 1:
+                    length = 1
+                    
+                elif format_num == 2:
+                    if i + 2 <= size:
+                        length = 2
+                        operand = self._format2_operand(mnemonic, data[i + 1])
+                    else:
+                        mnemonic = None
+                        
+                elif format_num != 3:
+                    # Format defined by a custom instruction set: raw operand bytes
+                    length = self.format_sizes.get(format_num, 1)
+                    if i + length <= size:
+                        operand = hex_data[2 * (i + 1):2 * (i + length)]
+                    else:
+                        mnemonic = None
+                        
+                elif i + 3 <= size:
+                    b1 = data[i + 1]
+                    ni = b0 & 0x03
+                    
+                    if ni == 0:
+                        # Standard SIC: 15-bit address, x flag only
+                        length = 3
+                        target = ((b1 & 0x7F) << 8) | data[i + 2]
+                        operand = self._label(target)
+                        if b1 & 0x80:
+                            operand += ',X'
+                            
+                    elif b1 & 0x10:
+                        # Format 4 (e = 1)
+                        if i + 4 <= size:
+                            length = 4
+                            target = ((b1 & 0x0F) << 16) | (data[i + 2] << 8) | data[i + 3]
+                            mnemonic = '+' + mnemonic
+                            operand = self._format34_operand(ni, b1, target, True)
+                        else:
+                            mnemonic = None
+                            
+                    else:
+                        length = 3
+                        disp = ((b1 & 0x0F) << 8) | data[i + 2]
+                        
+                        if b1 & 0x20:
+                            # PC-relative: signed 12-bit displacement
+                            if disp & 0x800:
+                                disp -= 0x1000
+                            target = (address + 3 + disp) & 0xFFFFF
+                            operand = self._format34_operand(ni, b1, target, True)
+                        elif b1 & 0x40:
+                            # Base-relative: base register value is not known
+                            operand = self._format34_operand(ni, b1, disp, False) + '(B)'
+                        else:
+                            operand = self._format34_operand(ni, b1, disp, ni != 0b01)
+                            
+                    if mnemonic in ('RSUB', '+RSUB') and not data[i + 2]:
+                        operand = ""
+                else:
+                    mnemonic = None
+                    
+            if mnemonic is None:
+                length = 1
+                mnemonic = 'BYTE'
+                operand = f"X'{b0:02X}'"
+                
+            append((
+                address,
+                hex_data[2 * i:2 * (i + length)],
+                labels.get(address, ""),
+                mnemonic,
+                operand
+            ))
+            i += length
+            
+        return entries
+        
+    def _format2_operand(self, mnemonic, registers):
+        """Decode the register byte of a Format 2 instruction"""
+        r1 = registers >> 4
+        r2 = registers & 0x0F
+        names = self.register_names
+        
+        if mnemonic == 'SVC':
+            return str(r1)
+        if mnemonic in self.ONE_REGISTER:
+            return names.get(r1, str(r1))
+        if mnemonic in self.SHIFTS:
+            return f"{names.get(r1, str(r1))},{r2 + 1}"
+        return f"{names.get(r1, str(r1))},{names.get(r2, str(r2))}"
+        
+    def _format34_operand(self, ni, flags, value, is_address):
+        """Build operand text with addressing prefix and index suffix"""
+        if ni == 0b01:
+            prefix = '#'
+        elif ni == 0b10:
+            prefix = '@'
+        else:
+            prefix = ''
+            
+        text = self._label(value) if is_address else str(value)
+        suffix = ',X' if flags & 0x80 else ''
+        return prefix + text + suffix
+        
+    def _label(self, address):
+        """Get label for an address, or its hex value"""
+        label = self.labels.get(address)
+        if label is not None:
+            return label
+        return f"{address:04X}"
+        
+    def format_listing(self, entries):
+        """Format decoded entries as listing text lines"""
+        return [
+            f"{address:06X}  {object_code:10s}  {label:8s} {mnemonic:8s} {operand}"
+            for address, object_code, label, mnemonic, operand in entries
+        ]
+
+
+def test_disassembler():
+    """Test function for Disassembler"""
+    print("Testing Disassembler...")
+    
+    from data_structures import OPTAB
+    
+    # Object program for the textbook COPY example (first two text records)
+    records = [
+        "H^COPY  ^000000^001077",
+        "T^000000^1D^17202D69202D4B1010360320262900003320074B10105D3F2FEC032010",
+        "T^00001D^13^0F20160100030F200D4B10105D3E2003454F46",
+        "M^000007^05",
+        "E^000000",
+    ]
+    
+    symbols = {
+        'FIRST': 0x0000, 'CLOOP': 0x0006, 'ENDFIL': 0x001A,
+        'EOF': 0x002D, 'RETADR': 0x0030, 'LENGTH': 0x0033,
+        'RDREC': 0x1036, 'WRREC': 0x105D,
+    }
+    
+    disassembler = Disassembler(OPTAB(), symbols)
+    entries = disassembler.disassemble_records(records)
+    
+    print(f"\nProgram: {disassembler.program_name}  "
+          f"Start: {disassembler.start_address:06X}  "
+          f"Entry: {disassembler.first_exec:06X}")
+    for line in disassembler.format_listing(entries):
+        print(f"  {line}")
+        
+    expected = ('STL', 'RETADR')
+    if (entries[0][3], entries[0][4]) == expected:
+        print("\n✓ Disassembler test passed")
+    else:
+        print(f"\n✗ Expected {expected}, got {entries[0][3:]}")
+
+
+if __name__ == '__main__':
+    test_disassembler()
\ No newline at end of file
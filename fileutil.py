@@ -0,0 +1,85 @@
+"""
+File Utilities for SIC/XE Assembler
+Atomic file writes through a temporary file and a rename
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import os
+import stat
+import tempfile
+
+
+def new_file_mode(filename):
+    """Permission bits a file written to filename should get
+    
+    An existing file keeps its mode; a new one gets 0666 less the umask,
+    as open(filename, 'w') would give it. (mkstemp files are 0600, and a
+    rename would otherwise carry that over.)
+    """
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write(filename, data):
+    """Write data (bytes, or str as text) to filename with an atomic rename
+    
+    Readers see either the old file or the complete new one, never a
+    partial write. The file gets the permissions new_file_mode gives it.
+    On failure the temporary file is removed and the error re-raised.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(
+        dir=directory, prefix='.' + os.path.basename(filename), suffix='.tmp'
+    )
+    try:
+        os.fchmod(fd, new_file_mode(filename))
+        with os.fdopen(fd, 'w' if isinstance(data, str) else 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def test_fileutil():
+    """Test function for file utilities"""
+    print("Testing file utilities...")
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'out.obj')
+        umask = os.umask(0o022)
+        try:
+            fresh = new_file_mode(path)
+            atomic_write(path, "H^COPY\n")
+            written = stat.S_IMODE(os.stat(path).st_mode)
+            os.chmod(path, 0o640)
+            existing = new_file_mode(path)
+            atomic_write(path, b"E^001000\n")
+            kept = stat.S_IMODE(os.stat(path).st_mode)
+        finally:
+            os.umask(umask)
+            
+        with open(path, 'rb') as f:
+            content = f.read()
+        leftovers = sorted(os.listdir(scratch))
+        
+    print(f"\nNew file: {fresh:04o} (written {written:04o}), existing file: {existing:04o} "
+          f"(kept {kept:04o})")
+    print(f"Content: {content!r}, files: {leftovers}")
+    if (fresh == written == 0o644 and existing == kept == 0o640
+            and content == b"E^001000\n" and leftovers == ['out.obj']):
+        print("\n✓ File utilities test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+if __name__ == '__main__':
+    test_fileutil()
\ No newline at end of file
@@ -5,15 +5,399 @@ Reads source file and parses instructions
 Team: Ilyas, Nadja (Shared)
 """
 
-import re
+import os
+import sys
 from data_structures import Instruction
 
+# Directives that splice another source file in place of the line
+INCLUDE_DIRECTIVES = ('INCLUDE', 'COPY')
+
+# Conditional-assembly directives; skipping a dead block only tracks these
+CONDITIONALS = ('IF', 'ELSE', 'ENDIF')
+
+# Parallel parsing: sources smaller than this are parsed in-process, and
+# each worker gets about this many chunks so uneven lines balance out
+PARALLEL_MIN_BYTES = 1 << 20
+CHUNKS_PER_JOB = 4
+
+# Tokenised include files shared by every InputProcessor in the process:
+# real path -> ((mtime_ns, size), [template Instruction])
+_include_cache = {}
+
+
+def clear_include_cache():
+    """Forget every cached include file"""
+    _include_cache.clear()
+
+
+class MappedSource:
+    """Memory-mapped source file plus the field spans of every line
+    
+    Spans are stored 8 per line in a flat array: line, label, operand
+    and comment as (start, end) byte offsets into the mapped buffer.
+    """
+    
+    def __init__(self, filename, buffer):
+        from array import array
+        
+        self.filename = filename
+        self.buffer = buffer
+        self.spans = array('q')
+        
+    def text(self, start, end):
+        """Materialise a span as a string"""
+        if start == end:
+            return ""
+        return self.buffer[start:end].decode('utf-8', 'replace')
+        
+    def close(self):
+        """Release the mapping (instructions become unusable)"""
+        self.buffer.close()
+
+
+class _SpanField:
+    """Descriptor that decodes a field from its span on first read
+    
+    The decoded string is kept in the instance, so later reads cost a dict
+    lookup; fields that are never read are never decoded. Assigning a
+    value replaces it.
+    """
+    
+    def __init__(self, slot):
+        self.slot = slot
+        
+    def __set_name__(self, owner, name):
+        self.key = '_' + name
+        
+    def __get__(self, instr, owner=None):
+        if instr is None:
+            return self
+        value = instr.__dict__.get(self.key)
+        if value is None:
+            i = instr._span_index + self.slot
+            spans = instr._source.spans
+            value = instr.__dict__[self.key] = instr._source.text(spans[i], spans[i + 1])
+        return value
+        
+    def __set__(self, instr, value):
+        instr.__dict__[self.key] = value
+
+
+class MappedInstruction(Instruction):
+    """Instruction whose text fields live in a MappedSource buffer
+    
+    Only the (interned) mnemonic is kept as a string; original_line, label,
+    operand and comment are decoded from the buffer when read.
+    """
+    
+    original_line = _SpanField(0)
+    label = _SpanField(2)
+    operand = _SpanField(4)
+    comment = _SpanField(6)
+    
+    # Defaults live on the class so each instance only stores what differs
+    address = 0
+    is_comment = False
+    is_directive = False
+    format = 0
+    object_code = ""
+    error = ""
+    reported = False
+    addr_mode = None
+    target = None
+    is_literal = False
+    literal_entry = None
+    literal_pool = None
+    base_range = None
+    source_file = None
+    
+    def __init__(self, line_num, source, span_index, mnemonic):
+        self.line_num = line_num
+        self._source = source
+        self._span_index = span_index
+        self.mnemonic = mnemonic
+
+
+def find_block_end(mnemonics, stop_at_else, depth=0):
+    """Find the ELSE/ENDIF closing a conditional block in a run of mnemonics
+    
+    ELSE only closes the block when stop_at_else is set (skipping an IF
+    branch, not an ELSE branch). depth is the nesting already open from
+    an earlier run. Returns (index of the closing mnemonic, 0), or
+    (-1, depth) if the run ends first, to continue in the next run.
+    """
+    for i, mnemonic in enumerate(mnemonics):
+        if mnemonic == 'IF':
+            depth += 1
+        elif mnemonic == 'ENDIF' or (mnemonic == 'ELSE' and stop_at_else):
+            if depth == 0:
+                return i, 0
+            depth -= mnemonic == 'ENDIF'
+    return -1, depth
+
+
+class _LineSource:
+    """Iterator over a file's lines as Instructions, created as consumed
+    
+    Subclasses hold the lines and provide _instruction(i) and
+    _mnemonics(start). Pass 1 calls skip_block() to jump over a disabled
+    IF/ELSE region without creating Instructions for the skipped lines.
+    """
+    
+    def __init__(self, processor, filename, count):
+        self.processor = processor
+        self.filename = filename
+        self.count = count
+        self.index = 0
+        self.pending = []  # Included instructions not yet consumed (reversed)
+        self.skipped = 0   # Number of lines bypassed by skip_block()
+        
+    def __len__(self):
+        return self.count
+        
+    def __iter__(self):
+        return self
+        
+    def __next__(self):
+        if self.pending:
+            return self.pending.pop()
+            
+        i = self.index
+        if i >= self.count:
+            raise StopIteration
+        self.index = i + 1
+        instr = self._instruction(i)
+        
+        if instr.mnemonic in INCLUDE_DIRECTIVES:
+            included = self.processor.expand_includes([instr], self.filename)
+            self.pending = included[:0:-1]
+        return instr
+        
+    def skip_block(self, stop_at_else=True):
+        """Skip to the ELSE or ENDIF that closes the current block
+        
+        Returns that line's Instruction, or None if the source ends first.
+        """
+        # Lines already expanded from an include file come first
+        pending = self.pending
+        found, depth = find_block_end(
+            (instr.mnemonic for instr in reversed(pending)), stop_at_else
+        )
+        if found >= 0:
+            closing = pending[-1 - found]
+            del pending[-1 - found:]
+            self.skipped += found
+            return closing
+        self.skipped += len(pending)
+        pending.clear()
+        
+        found, _ = find_block_end(self._mnemonics(self.index), stop_at_else, depth)
+        if found < 0:
+            self.skipped += self.count - self.index
+            self.index = self.count
+            return None
+            
+        self.skipped += found
+        i = self.index + found
+        self.index = i + 1
+        return self._instruction(i)
+
+
+class SourceReader(_LineSource):
+    """Source file read as text and tokenised one line at a time
+    
+    Skipped lines are only checked for a conditional mnemonic, never
+    tokenised.
+    """
+    
+    def __init__(self, processor, filename):
+        try:
+            with open(filename, 'r') as f:
+                self.lines = f.readlines()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file '{filename}' not found")
+        except Exception as e:
+            raise Exception(f"Error reading file: {e}")
+        super().__init__(processor, filename, len(self.lines))
+        
+    def _instruction(self, i):
+        return self.processor.parse_line(self.lines[i], i + 1)
+        
+    def _mnemonics(self, start):
+        for i in range(start, len(self.lines)):
+            line = self.lines[i]
+            upper = line.upper()
+            if 'IF' not in upper and 'ELSE' not in upper:
+                yield ''
+                continue
+                
+            # Mnemonic is the first field of an unlabelled line, else the second
+            fields = upper.split('.', 1)[0].split(None, 2)
+            if not fields:
+                yield ''
+            elif line[0] in ' \t':
+                yield fields[0]
+            else:
+                yield fields[1] if len(fields) > 1 else ''
+
+
+class ChunkedSource(_LineSource):
+    """Pre-tokenised source lines, joined from per-chunk field columns
+    
+    Skipped lines are found by scanning the mnemonic column.
+    """
+    
+    def __init__(self, processor, filename, chunks):
+        self.lines = []
+        self.labels = []
+        self.mnemonics = []
+        self.operands = []
+        self.comments = []
+        self.comment_flags = bytearray()
+        for lines, labels, mnemonics, operands, comments, flags in chunks:
+            self.lines.extend(lines)
+            self.labels.extend(labels)
+            self.mnemonics.extend(mnemonics)
+            self.operands.extend(operands)
+            self.comments.extend(comments)
+            self.comment_flags.extend(flags)
+        super().__init__(processor, filename, len(self.lines))
+        
+    def _instruction(self, i):
+        instr = Instruction(i + 1, self.lines[i])
+        instr.label = self.labels[i]
+        instr.mnemonic = self.mnemonics[i]
+        instr.operand = self.operands[i]
+        instr.comment = self.comments[i]
+        instr.is_comment = bool(self.comment_flags[i])
+        return instr
+        
+    def _mnemonics(self, start):
+        from itertools import islice
+        
+        return islice(self.mnemonics, start, None)
+
+
+def _decode_lines(data):
+    """Source bytes as lines without newlines, as text-mode reading sees them"""
+    text = data.decode('utf-8', 'replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def _chunk_offsets(data, count):
+    """Split data (bytes or mmap) into at most count (start, end) ranges ending after a newline"""
+    size = len(data)
+    offsets = [0]
+    for k in range(1, count):
+        newline = data.find(b'\n', max(size * k // count, offsets[-1]))
+        if newline < 0 or newline + 1 >= size:
+            break
+        offsets.append(newline + 1)
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+
+_chunk_processor = None
+
+
+def _parse_chunk(task):
+    """Worker: read and tokenise one byte range of a file into field columns
+    
+    Returns (lines, labels, mnemonics, operands, comments, comment flags).
+    Equal mnemonics share one string object, so each is pickled only once.
+    """
+    global _chunk_processor
+    if _chunk_processor is None:
+        _chunk_processor = InputProcessor()
+    split_fields = _chunk_processor.split_fields
+    
+    filename, start, end = task
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        lines = _decode_lines(f.read(end - start)) if end > start else []
+        
+    labels = []
+    mnemonics = []
+    operands = []
+    comments = []
+    flags = bytearray(len(lines))
+    shared = {}
+    
+    for i, line in enumerate(lines):
+        label, mnemonic, operand, comment, is_comment = split_fields(line)
+        labels.append(label)
+        mnemonics.append(shared.setdefault(mnemonic, mnemonic))
+        operands.append(operand)
+        comments.append(comment)
+        flags[i] = is_comment
+        
+    return lines, labels, mnemonics, operands, comments, bytes(flags)
+
 
 class InputProcessor:
     """Handles reading and parsing of assembly source files"""
     
     def __init__(self):
         self.errors = []
+        self.includes = set()  # Real paths of every file an include named, found or not
+        
+    def open_source(self, filename, jobs=1, mapped=False):
+        """Get a SourceReader that parses filename lazily, line by line
+        
+        With jobs > 1 the file is tokenised in parallel up front instead
+        (see read_source_parallel); with mapped, it is indexed through
+        mmap (see read_source_mapped).
+        """
+        if mapped:
+            return self.read_source_mapped(filename)
+        if jobs is not None and jobs > 1:
+            return self.read_source_parallel(filename, jobs)
+        return SourceReader(self, filename)
+        
+    def read_source_parallel(self, filename, jobs=None, min_bytes=PARALLEL_MIN_BYTES):
+        """Tokenise filename in chunks across worker processes
+        
+        The file is cut at newline-aligned byte offsets, found in a
+        memory map without reading or decoding the rest of it. Each worker
+        reads and decodes only its own chunk and sends it back as field
+        columns (plus the line text) rather than Instruction objects; the
+        columns are joined in order into a ChunkedSource, which Pass 1
+        reads like a SourceReader. Files under min_bytes, or jobs of 1,
+        are parsed in this process with the same code.
+        """
+        import mmap
+        
+        jobs = jobs or os.cpu_count() or 1
+        try:
+            with open(filename, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < min_bytes:
+                    jobs = 1
+                if size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        offsets = _chunk_offsets(buffer, jobs * CHUNKS_PER_JOB)
+                else:
+                    offsets = []
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file '{filename}' not found")
+        except Exception as e:
+            raise Exception(f"Error reading file: {e}")
+            
+        tasks = [(filename, start, end) for start, end in offsets]
+        
+        if jobs <= 1 or len(tasks) <= 1:
+            chunks = [_parse_chunk(task) for task in tasks]
+        else:
+            from multiprocessing import Pool
+            with Pool(min(jobs, len(tasks))) as pool:
+                chunks = pool.map(_parse_chunk, tasks)
+                
+        return ChunkedSource(self, filename, chunks)
         
     def read_source_file(self, filename):
         """Read source file and return list of Instruction objects"""
@@ -32,45 +416,222 @@ class InputProcessor:
         except Exception as e:
             raise Exception(f"Error reading file: {e}")
             
+        return self.expand_includes(instructions, filename)
+        
+    def expand_includes(self, instructions, filename, including=()):
+        """Replace INCLUDE/COPY lines' files with their instructions, recursively
+        
+        The directive line itself is kept as a comment so listings show it.
+        Included instructions keep their own line numbers and record the
+        file in source_file. including holds the real paths of the files
+        being expanded, to detect cycles. A line that cannot be expanded
+        (no file name, missing file, cycle) is left as it is with the
+        reason in instr.error, for Pass 1 to report. Every file named is
+        added to self.includes.
+        """
+        if not any(instr.mnemonic in INCLUDE_DIRECTIVES for instr in instructions):
+            return instructions
+            
+        including = including + (os.path.realpath(filename),)
+        expanded = []
+        
+        for instr in instructions:
+            expanded.append(instr)
+            if instr.mnemonic not in INCLUDE_DIRECTIVES or instr.is_comment:
+                continue
+                
+            path = self.include_path(instr, filename)
+            if not path:
+                instr.error = f"{instr.mnemonic} needs a file name"
+                continue
+            self.includes.add(os.path.realpath(path))
+            
+            if os.path.realpath(path) in including:
+                chain = ' -> '.join(os.path.basename(p) for p in including)
+                instr.error = f"Include cycle {chain} -> {os.path.basename(path)}"
+                continue
+                
+            try:
+                included = self._load_include(path)
+            except FileNotFoundError:
+                instr.error = f"Include file '{path}' not found"
+                continue
+            except OSError as e:
+                instr.error = f"Cannot read include file '{path}': {e.strerror or e}"
+                continue
+                
+            instr.is_comment = True
+            expanded.extend(self.expand_includes(included, path, including))
+            
+        return expanded
+        
+    def include_path(self, instr, filename):
+        """Path of the file an INCLUDE/COPY line in filename names ("" if none)
+        
+        Relative names are taken from the directory of the including file.
+        """
+        name = self._include_name(instr)
+        if not name:
+            return ""
+        return os.path.normpath(os.path.join(os.path.dirname(filename), name))
+        
+    def _include_name(self, instr):
+        """File name operand of an include line
+        
+        Taken from the raw line, since the tokenizer treats the '.' of a
+        file extension as the start of a comment.
+        """
+        fields = instr.original_line.split()
+        for i, field in enumerate(fields[:-1]):
+            if field.upper() == instr.mnemonic:
+                return fields[i + 1].strip('\'"')
+        return ""
+        
+    def _load_include(self, path):
+        """Fresh instructions for an include file, tokenising it only once
+        
+        Files are cached process-wide by real path and re-read only when
+        their mtime or size changes. Each call returns new Instruction
+        objects (copies of the cached ones), since the passes fill them in.
+        """
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = os.path.realpath(path)
+        
+        cached = _include_cache.get(key)
+        if cached is None or cached[0] != stamp:
+            with open(path, 'r') as f:
+                templates = [self.parse_line(line, line_num)
+                             for line_num, line in enumerate(f, start=1)]
+            for template in templates:
+                template.source_file = path
+            cached = (stamp, templates)
+            _include_cache[key] = cached
+            
+        instructions = []
+        append = instructions.append
+        new = Instruction.__new__
+        for template in cached[1]:
+            instr = new(Instruction)
+            instr.__dict__.update(template.__dict__)
+            append(instr)
         return instructions
         
+    # One match per source line: whole line, label, mnemonic, operand and
+    # comment. A label must start in column 1; fields stop at the first '.'.
+    # Compiled on first use, so plain parsing never imports re.
+    _MAPPED_LINE_PATTERN = (
+        rb'^(([^\s.]+)?[ \t]*([^\s.]+)?[ \t]*([^\n.]*[^\s.])?[ \t\r]*(\.[^\n\r]*)?)\r?$'
+    )
+    _mapped_line = None
+    
+    @classmethod
+    def _mapped_line_regex(cls):
+        if cls._mapped_line is None:
+            import re
+            cls._mapped_line = re.compile(cls._MAPPED_LINE_PATTERN, re.M)
+        return cls._mapped_line
+        
+    def read_source_mapped(self, filename):
+        """Read source file via mmap, returning MappedInstruction objects
+        
+        Produces the same fields as read_source_file, but each line only
+        stores byte offsets into the mapped file; text is decoded lazily.
+        """
+        import mmap
+        
+        try:
+            with open(filename, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file '{filename}' not found")
+        except Exception as e:
+            raise Exception(f"Error reading file: {e}")
+            
+        source = MappedSource(filename, buffer)
+        spans = source.spans
+        extend = spans.extend
+        instructions = []
+        append = instructions.append
+        mnemonics = {}
+        size = len(buffer)
+        line_num = 0
+        index = 0
+        
+        for match in self._mapped_line_regex().finditer(buffer):
+            # regs holds the (start, end) span of every group, (-1, -1) if unmatched
+            _, (line_start, line_end), label, mnemonic_span, operand, comment = match.regs
+            if line_start == size:
+                break  # Empty match after the final newline
+            line_num += 1
+            if line_end > line_start and buffer[line_end - 1] == 13:
+                line_end -= 1  # CRLF: the '\r' is not part of the line
+                
+            label_start, label_end = label if label[0] >= 0 else (line_end, line_end)
+            comment_start, comment_end = comment if comment[0] >= 0 else (line_end, line_end)
+            
+            if mnemonic_span[0] < 0 and label_start == line_end:
+                # Blank or comment-only line
+                while comment_end > comment_start and buffer[comment_end - 1] in b' \t':
+                    comment_end -= 1
+                instr = MappedInstruction(line_num, source, index, "")
+                instr.is_comment = True
+                operand_start = operand_end = line_end
+            else:
+                mnemonic = ""
+                if mnemonic_span[0] >= 0:
+                    raw = buffer[mnemonic_span[0]:mnemonic_span[1]]
+                    mnemonic = mnemonics.get(raw)
+                    if mnemonic is None:
+                        mnemonic = sys.intern(raw.decode('utf-8', 'replace').upper())
+                        mnemonics[raw] = mnemonic
+                operand_start, operand_end = operand if operand[0] >= 0 else (line_end, line_end)
+                instr = MappedInstruction(line_num, source, index, mnemonic)
+                
+            extend((line_start, line_end, label_start, label_end,
+                    operand_start, operand_end, comment_start, comment_end))
+            append(instr)
+            index += 8
+            
+        return self.expand_includes(instructions, filename)
+        
     def parse_line(self, line, line_num):
         """Parse a single line into an Instruction object"""
         instr = Instruction(line_num, line.rstrip('\n'))
+        (instr.label, instr.mnemonic, instr.operand,
+         instr.comment, instr.is_comment) = self.split_fields(line)
+        return instr
         
+    def split_fields(self, line):
+        """Split a line into (label, mnemonic, operand, comment, is_comment)"""
         # Remove trailing newline and handle empty lines
         line = line.rstrip('\n')
         
         if not line or line.strip() == '':
-            instr.is_comment = True
-            return instr
+            return "", "", "", "", True
             
         # Check for comment line (starts with .)
         if line.strip().startswith('.'):
-            instr.is_comment = True
-            instr.comment = line.strip()
-            return instr
+            return "", "", "", line.strip(), True
             
         # Split line into components
         # Format: [LABEL] MNEMONIC [OPERAND] [COMMENT]
         
         # Check for inline comment
+        comment = ""
         if '.' in line:
             # Split at first . that's not part of a string
             parts = line.split('.', 1)
             line = parts[0]
-            instr.comment = '.' + parts[1]
+            comment = '.' + parts[1]
             
         line = line.rstrip()
         
         # Tokenize the line
         label, mnemonic, operand = self._tokenize(line)
-        
-        instr.label = label
-        instr.mnemonic = mnemonic
-        instr.operand = operand
-        
-        return instr
+        return label, mnemonic, operand, comment, False
         
     def _tokenize(self, line):
         """Split line into label, mnemonic, operand"""
@@ -164,8 +725,59 @@ BETA    RESW    1
             print(f"  Line {instr.line_num}: "
                   f"'{instr.label}' '{instr.mnemonic}' '{instr.operand}'")
                   
-    import os
+    # Mapped mode must produce the same fields, from LF or CRLF files
+    with open('test_input_crlf.asm', 'w', newline='\r\n') as f:
+        f.write(test_code)
+    fields = ('line_num', 'label', 'mnemonic', 'operand', 'comment', 'is_comment',
+              'original_line')
+    for name in ('test_input.asm', 'test_input_crlf.asm'):
+        mapped = processor.open_source(name, mapped=True)
+        for plain, lazy in zip(instructions, mapped):
+            for field in fields:
+                if getattr(plain, field) != getattr(lazy, field):
+                    print(f"✗ Mapped mode differs on {name} line {plain.line_num}: {field}")
+    cached = mapped[2].operand is mapped[2].operand
+    print(f"Mapped fields decoded once: {cached}")
+    if not cached:
+        print("✗ Mapped fields are decoded on every read")
+    os.remove('test_input_crlf.asm')
+    
+    # Parallel chunked parsing must too, with the right line numbers
+    chunked = list(processor.read_source_parallel('test_input.asm', jobs=2, min_bytes=0))
+    same = len(chunked) == len(instructions) and all(
+        getattr(plain, field) == getattr(parallel, field)
+        for plain, parallel in zip(instructions, chunked) for field in fields
+    )
+    print(f"\nParallel parse matches: {same}")
+    if not same:
+        print("✗ Parallel parse differs")
+        
     os.remove('test_input.asm')
+    
+    # INCLUDE splices a file in, keeping its own line numbers
+    import tempfile
+    with tempfile.TemporaryDirectory() as scratch:
+        main_path = os.path.join(scratch, 'main.asm')
+        header_path = os.path.join(scratch, 'header.asm')
+        with open(header_path, 'w') as f:
+            f.write(". Shared equates\nMAXLEN  EQU     1000\n")
+        with open(main_path, 'w') as f:
+            f.write("PROG    START   0\n        INCLUDE header.asm\n        END     PROG\n")
+            
+        first = processor.read_source_file(main_path)
+        second = processor.read_source_file(main_path)
+        included = [i for i in first if i.source_file]
+        print(f"\nIncluded lines: {[(i.source_file[-10:], i.line_num, i.label) for i in included]}")
+        print(f"Cached copies are distinct objects: {first[3] is not second[3]}")
+        
+        # A file including itself, or a missing file, is flagged on the line
+        with open(header_path, 'w') as f:
+            f.write("        INCLUDE main.asm\n        INCLUDE missing.asm\n        INCLUDE\n")
+        failed = [i.error for i in processor.read_source_file(main_path) if i.error]
+        print(f"Include errors: {failed}")
+        if len(failed) != 3 or not failed[0].startswith("Include cycle"):
+            print("✗ Include errors not flagged")
+            
     print("\n✓ InputProcessor test passed")
 
 
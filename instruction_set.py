@@ -0,0 +1,219 @@
+"""
+Instruction Set Loader for SIC/XE Assembler
+Loads OPTAB/register tables from a declarative spec file
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import json
+import os
+import pickle
+
+from fileutil import atomic_write
+
+# Bump when the compiled layout changes so stale caches are rebuilt
+CACHE_VERSION = 2
+
+DEFAULT_FORMAT_SIZES = {1: 1, 2: 2, 3: 3, 4: 4}
+
+
+def load_instruction_set(spec_path, use_cache=True):
+    """Load a compiled instruction set for spec_path
+    
+    Returns a dict with 'instructions' ({mnemonic: (opcode, format)}),
+    'registers', 'directives', 'format_sizes' and 'cycles'. The parsed spec is
+    cached next to the spec file and reused while the spec is unchanged.
+    """
+    stat = os.stat(spec_path)
+    key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_path = cache_path_for(spec_path)
+    
+    if use_cache:
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, compiled = pickle.load(f)
+            if cached_key == key:
+                return compiled
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            pass
+            
+    compiled = compile_spec(read_spec(spec_path), spec_path)
+    
+    if use_cache:
+        _write_cache(cache_path, key, compiled)
+        
+    return compiled
+
+
+def cache_path_for(spec_path):
+    """Path of the compiled cache for a spec file"""
+    return os.path.splitext(spec_path)[0] + '.optab.pickle'
+
+
+def read_spec(spec_path):
+    """Read a JSON or TOML spec file into a dict"""
+    if spec_path.endswith('.toml'):
+        import tomllib
+        with open(spec_path, 'rb') as f:
+            return tomllib.load(f)
+            
+    with open(spec_path, 'r') as f:
+        return json.load(f)
+
+
+def compile_spec(spec, source="spec"):
+    """Validate a spec dict and convert it to lookup tables"""
+    format_sizes = dict(DEFAULT_FORMAT_SIZES)
+    for format_num, size in spec.get('format_sizes', {}).items():
+        format_sizes[int(format_num)] = int(size)
+        
+    instructions = {}
+    for mnemonic, entry in spec.get('instructions', {}).items():
+        try:
+            opcode, format_num = entry
+            opcode = _to_int(opcode)
+            format_num = int(format_num)
+        except (TypeError, ValueError):
+            raise ValueError(f"{source}: bad entry for '{mnemonic}': {entry!r}")
+            
+        if not 0 <= opcode <= 0xFF:
+            raise ValueError(f"{source}: opcode for '{mnemonic}' out of range")
+        if format_num not in format_sizes:
+            raise ValueError(f"{source}: unknown format {format_num} for '{mnemonic}'")
+            
+        instructions[mnemonic.upper()] = (opcode, format_num)
+        
+    registers = {}
+    for name, code in spec.get('registers', {}).items():
+        registers[name.upper()] = _to_int(code)
+        
+    directives = {name.upper() for name in spec.get('directives', [])}
+    
+    # Optional cost table: {"formats": {"3": 3}, "instructions": {"MUL": 6}}
+    cycles = spec.get('cycles', {})
+    cycles = {
+        'formats': {int(k): int(v) for k, v in cycles.get('formats', {}).items()},
+        'instructions': {k.upper(): int(v) for k, v in cycles.get('instructions', {}).items()},
+    }
+    
+    return {
+        'name': spec.get('name', source),
+        'instructions': instructions,
+        'registers': registers,
+        'directives': directives,
+        'format_sizes': format_sizes,
+        'cycles': cycles,
+    }
+
+
+def builtin_spec():
+    """Spec dict for the built-in tables in data_structures
+    
+    sicxe.json is generated from this (see format_spec), so the shipped
+    spec and the built-in OPTAB cannot drift apart.
+    """
+    from data_structures import (OPCODES, DIRECTIVES, REGISTERS, FORMAT_SIZES,
+                                 FORMAT_CYCLES, MNEMONIC_CYCLES)
+                                 
+    return {
+        'name': 'SIC/XE',
+        'format_sizes': {str(k): v for k, v in sorted(FORMAT_SIZES.items())},
+        'instructions': {mnemonic: [f"0x{opcode:02X}", format_num]
+                         for mnemonic, (opcode, format_num) in sorted(OPCODES.items())},
+        'registers': dict(REGISTERS),
+        'directives': sorted(DIRECTIVES),
+        'cycles': {
+            'formats': {str(k): v for k, v in sorted(FORMAT_CYCLES.items())},
+            'instructions': dict(sorted(MNEMONIC_CYCLES.items())),
+        },
+    }
+
+
+def format_spec(spec):
+    """JSON text for a spec, one instruction per line"""
+    dumps = json.dumps
+    lines = ["{"]
+    for i, (key, value) in enumerate(spec.items()):
+        comma = "," if i < len(spec) - 1 else ""
+        if isinstance(value, dict) and len(value) > 10:
+            lines.append(f"    {dumps(key)}: {{")
+            entries = [f"        {dumps(k)}: {dumps(v)}" for k, v in value.items()]
+            lines.append(",\n".join(entries))
+            lines.append(f"    }}{comma}")
+        else:
+            lines.append(f"    {dumps(key)}: {dumps(value)}{comma}")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def _to_int(value):
+    """Accept ints or strings like '0x18' / '18' (hex)"""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if text.lower().startswith('0x'):
+        text = text[2:]
+    return int(text, 16)
+
+
+def _write_cache(cache_path, key, compiled):
+    """Write the compiled tables atomically; caching is best effort"""
+    data = pickle.dumps((key, compiled), protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        atomic_write(cache_path, data)
+    except OSError:
+        pass
+
+
+def test_instruction_set():
+    """Test function for the instruction set loader"""
+    print("Testing instruction set loader...")
+    
+    from data_structures import OPTAB
+    
+    spec_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sicxe.json')
+    optab = OPTAB.from_spec(spec_path)
+    default = OPTAB()
+    
+    print(f"\nLoaded {len(optab.table)} instructions, "
+          f"{len(optab.registers)} registers from {os.path.basename(spec_path)}")
+          
+    # A variant spec with an extra opcode and a 5-byte format
+    variant = compile_spec({
+        'instructions': {'LDA': ['00', 3], 'XLOAD': ['0xFC', 5]},
+        'registers': {'A': 0, 'X': 1},
+        'format_sizes': {'5': 5},
+    })
+    custom = OPTAB(variant['instructions'], variant['directives'] or None,
+                   variant['registers'], variant['format_sizes'])
+    print(f"Variant: XLOAD format {custom.get_format('XLOAD')}, "
+          f"size {custom.get_size(custom.get_format('XLOAD'))}")
+          
+    # Each built-in OPTAB has its own tables
+    OPTAB().table['XTEST'] = (0xFC, 3)
+    isolated = OPTAB().get_opcode('XTEST') is None
+    print(f"Built-in tables isolated per OPTAB: {isolated}")
+    
+    # The shipped spec must be exactly what the built-in tables generate
+    with open(spec_path, 'r') as f:
+        shipped = f.read()
+    in_sync = shipped == format_spec(builtin_spec())
+    print(f"{os.path.basename(spec_path)} matches built-in tables: {in_sync}")
+    
+    if (in_sync and isolated and optab.table == default.table and optab.registers == default.registers
+            and optab.directives == default.directives
+            and optab.mnemonic_cycles == default.mnemonic_cycles):
+        print("\n✓ Instruction set test passed")
+    else:
+        print("\n✗ Spec tables differ from built-in tables "
+              "(regenerate with: python instruction_set.py --write sicxe.json)")
+
+
+if __name__ == '__main__':
+    import sys
+    
+    if sys.argv[1:2] == ['--write'] and len(sys.argv) == 3:
+        with open(sys.argv[2], 'w') as f:
+            f.write(format_spec(builtin_spec()))
+    else:
+        test_instruction_set()
\ No newline at end of file
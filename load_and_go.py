@@ -0,0 +1,312 @@
+"""
+Load-and-Go Assembly for SIC/XE Assembler
+Assembles in one pass straight into a memory image, backpatching forward references
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+from data_structures import OPTAB
+from input_processor import InputProcessor
+from pass1 import Pass1Assembler, CONDITIONALS
+from pass2 import Pass2Assembler
+from segments import SegmentMap
+
+# Directives whose size or address effect depends on their operand. If one
+# of these names a symbol that is not defined yet, a single pass cannot
+# place the code after it, so assembly falls back to two passes.
+SIZE_DIRECTIVES = {'RESW': 10, 'RESB': 10, 'ORG': 16, 'EQU': 16}
+
+
+class LoadAndGo:
+    """One-pass assembler writing object code directly into memory
+    
+    Each line goes through Pass1Assembler.step() and then, if its operand
+    is already known, Pass2Assembler.step(). A line referring to a symbol
+    or literal without an address yet is chained on that symbol/literal
+    and re-encoded into the image when it is defined. Format 3 lines that
+    need base-relative addressing wait for END, when Pass 1 has resolved
+    the BASE ranges.
+    """
+    
+    def __init__(self, instructions, optab=None):
+        # A lazy reader is read into a list: the two-pass fallback needs
+        # every line again, including those of skipped IF branches
+        if not isinstance(instructions, list):
+            instructions = list(instructions)
+        self.instructions = instructions
+        self.optab = optab if optab is not None else OPTAB()
+        self.pass1 = Pass1Assembler(instructions, self.optab)
+        self.pass2 = Pass2Assembler(instructions, self.pass1.symtab,
+                                    self.pass1.littab, self.optab)
+        self.segments = SegmentMap()   # Loaded bytes; RESW/RESB gaps take no space
+        self.start_address = 0
+        self.entry_point = 0
+        self.fell_back = False
+        self.fixups = {}           # symbol -> [instr waiting for its address]
+        self.literal_fixups = {}   # id(LITTAB entry) -> [instr]
+        self.deferred = []         # instr encoded after END (needs BASE)
+        self.patched = 0           # Number of backpatched instructions
+        
+    @property
+    def symtab(self):
+        return self.pass1.symtab
+        
+    @property
+    def memory(self):
+        """Flat image from the load address, with gaps zero-filled"""
+        return self.segments.to_image(self.start_address)
+        
+    @property
+    def errors(self):
+        """Diagnostics from both halves, in order"""
+        return list(self.pass1.errors) + list(self.pass2.errors)
+        
+    @property
+    def ok(self):
+        """True if neither half reported an error"""
+        return not (self.pass1.errors.has_errors() or self.pass2.errors.has_errors())
+        
+    def process(self):
+        """Assemble into self.segments; returns the segment map"""
+        started = False
+        lines = iter(self.instructions)
+        kept = []
+        
+        for instr in lines:
+            kept.append(instr)
+            if instr.is_comment:
+                continue
+                
+            if not started:
+                started = True
+                if instr.mnemonic == 'START':
+                    self.pass1.start(instr)
+                    self.start_address = self.pass1.start_address
+                    continue
+                    
+            if instr.mnemonic in CONDITIONALS:
+                closing = self.pass1.conditional(instr, lines)
+                if closing is not None:
+                    kept.append(closing)
+                continue
+                
+            if self._needs_two_passes(instr):
+                return self._two_pass()
+                
+            more = self.pass1.step(instr)
+            
+            if instr.label in self.fixups and self.symtab.exists(instr.label):
+                self._backpatch(self.fixups.pop(instr.label))
+            if instr.literal_pool:
+                for entry in instr.literal_pool:
+                    self._backpatch(self.literal_fixups.pop(id(entry), ()))
+                    
+            if not more:
+                self.entry_point = self._entry(instr)
+                self._encode(instr)
+                break
+                
+            self._encode_or_chain(instr)
+            
+        # Only the lines outside disabled IF branches take part from here on
+        kept.extend(lines)
+        self.pass1.instructions = self.pass2.instructions = kept
+        self.pass1.finish()
+        
+        # Whatever is still waiting is encoded now: base-relative lines get
+        # their BASE range, undefined symbols get reported by Pass 2
+        waiting = self.deferred
+        for chain in self.fixups.values():
+            waiting.extend(chain)
+        for chain in self.literal_fixups.values():
+            waiting.extend(chain)
+        for instr in sorted(waiting, key=lambda i: i.line_num):
+            self._encode(instr)
+            
+        self.fixups = {}
+        self.literal_fixups = {}
+        self.deferred = []
+        self.pass2._check_unused_bases()
+        return self.segments
+        
+    def _needs_two_passes(self, instr):
+        """True if instr's size or address effect uses an undefined symbol"""
+        base = SIZE_DIRECTIVES.get(instr.mnemonic)
+        operand = instr.operand
+        if base is None or not operand or operand == '*':
+            return False
+        try:
+            int(operand, base)
+            return False
+        except ValueError:
+            return not self.symtab.exists(operand)
+            
+    def _encode_or_chain(self, instr):
+        """Encode instr now, or chain it on whatever it is waiting for"""
+        if instr.mnemonic == 'WORD':
+            operand = instr.operand
+            if operand[:1].isalpha() and not self.symtab.exists(operand):
+                self.fixups.setdefault(operand, []).append(instr)
+                return
+                
+        if instr.is_directive or instr.format not in (3, 4):
+            self._encode(instr)
+            return
+            
+        target = instr.target
+        if instr.is_literal:
+            entry = instr.literal_entry
+            if entry is not None and entry['address'] is None:
+                self.literal_fixups.setdefault(id(entry), []).append(instr)
+                return
+        elif isinstance(target, str) and not self.symtab.exists(target):
+            self.fixups.setdefault(target, []).append(instr)
+            return
+            
+        if instr.format == 3 and not self._pc_reachable(instr):
+            self.deferred.append(instr)
+            return
+            
+        self._encode(instr)
+        
+    def _pc_reachable(self, instr):
+        """True unless a Format 3 target is beyond PC-relative range"""
+        target = instr.target
+        if target is None or (type(target) is int and 0 <= target <= 4095):
+            return True
+        address = self.pass2._resolve_address(instr)
+        if (address is not None and 0 <= address <= 4095
+                and not instr.is_literal and target in self.symtab.absolute):
+            return True  # Small absolute EQU symbol: encoded directly
+        return address is None or -2048 <= address - (instr.address + 3) <= 2047
+        
+    def _backpatch(self, chain):
+        """Re-encode instructions whose symbol or literal just got an address"""
+        for instr in chain:
+            self.patched += 1
+            self._encode_or_chain(instr)
+            
+    def _encode(self, instr):
+        """Run Pass 2 on one instruction and store its bytes"""
+        self.pass2.step(instr)
+        self.store(instr.address, instr.object_code)
+        
+    def store(self, address, object_code):
+        """Write hex object code into memory at an absolute address
+        
+        A backpatched line overwrites the bytes stored for it earlier.
+        """
+        if not object_code or object_code == "ERROR":
+            return
+        if address < self.start_address:
+            return  # Below the load address (ORG before START)
+        self.segments.add(address, bytes.fromhex(object_code))
+        
+    def _entry(self, end_instr):
+        """Execution start from the END operand"""
+        operand = end_instr.operand
+        if operand and self.symtab.exists(operand):
+            return self.symtab.get_address(operand)
+        return self.start_address
+        
+    def _two_pass(self):
+        """Fallback: assemble with two full passes, then load the result"""
+        self.fell_back = True
+        for instr in self.instructions:
+            instr.object_code = ""
+            instr.reported = False
+            instr.literal_entry = None
+            instr.literal_pool = None
+            instr.base_range = None
+            
+        self.pass1 = Pass1Assembler(self.instructions, self.optab)
+        self.pass1.process()
+        self.pass2 = Pass2Assembler(self.instructions, self.pass1.symtab,
+                                    self.pass1.littab, self.optab)
+        self.pass2.process()
+        
+        self.segments = SegmentMap()
+        self.start_address = self.pass1.start_address
+        for instr in self.instructions:
+            if instr.is_comment:
+                continue
+            self.store(instr.address, instr.object_code)
+            if instr.mnemonic == 'END':
+                self.entry_point = self._entry(instr)
+                break
+        return self.segments
+
+
+def load_and_go(source, optab=None):
+    """Assemble a source file in one pass; returns the LoadAndGo"""
+    assembler = LoadAndGo(InputProcessor().read_source_file(source), optab)
+    assembler.process()
+    return assembler
+
+
+def test_load_and_go():
+    """Test function for load-and-go assembly"""
+    print("Testing load-and-go assembly...")
+    
+    import glob
+    from objdiff import ObjectImage
+    from output_generator import OutputGenerator
+    
+    optab = OPTAB()
+    failed = 0
+    
+    for source in sorted(glob.glob('test*.asm')):
+        one = load_and_go(source, optab)
+        
+        # Reference: the normal two-pass pipeline
+        instructions = InputProcessor().read_source_file(source)
+        pass1 = Pass1Assembler(instructions, optab)
+        symtab, littab, _ = pass1.process()
+        pass2 = Pass2Assembler(pass1.instructions, symtab, littab, optab)
+        pass2.process()
+        generator = OutputGenerator()
+        generator._emit(pass1.instructions, pass2, want_object=True, want_listing=False)
+        image = ObjectImage.from_output(generator)
+        
+        same = all(one.segments.read(start, len(data)) == data
+                   for start, data in image.segments)
+        same = same and one.entry_point == image.entry
+        if not same:
+            failed += 1
+        print(f"  {'✓' if same else '✗'} {source}: {one.segments.size()} bytes, "
+              f"{one.patched} backpatched, {len(one.errors)} diagnostic(s)"
+              f"{' (two-pass fallback)' if one.fell_back else ''}")
+              
+    lines = [
+        "PROG    START   100",
+        "LEN     EQU     BUFEND",
+        "BUFEND  RESB    1",
+        "        END     PROG",
+    ]
+    processor = InputProcessor()
+    fallback = LoadAndGo([processor.parse_line(line, i) for i, line in enumerate(lines, 1)], optab)
+    fallback.process()
+    print(f"  Forward EQU falls back to two passes: {fallback.fell_back}")
+    
+    # The same from a lazy reader, which the fallback cannot re-read
+    import os
+    import tempfile
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'forward.asm')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines[:2] + ["FIRST   LDA     #LEN", "        FOO     1"]
+                              + lines[2:]) + '\n')
+        lazy = LoadAndGo(processor.open_source(path), optab)
+        lazy.process()
+    lazy_codes = [e.code for e in lazy.errors]
+    print(f"  From a lazy reader: {lazy.segments.size()} bytes, diagnostics {lazy_codes}")
+    
+    if (not failed and fallback.fell_back and lazy.fell_back
+            and lazy.segments.size() == 3 and lazy_codes == ['invalid-mnemonic']):
+        print("\n✓ Load-and-go test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+if __name__ == '__main__':
+    test_load_and_go()
\ No newline at end of file
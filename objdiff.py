@@ -0,0 +1,274 @@
+"""
+Object File Diff for SIC/XE Assembler
+Compares object programs by address, not by record text
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import sys
+
+from segments import SegmentMap
+
+# Differing regions are located block by block before going byte by byte
+BLOCK_SIZE = 64
+
+
+class ObjectImage:
+    """Loaded form of an object program: header, byte segments and M records"""
+    
+    def __init__(self):
+        self.name = ""
+        self.start = 0
+        self.length = 0
+        self.entry = 0
+        self.segments = []         # Sorted, non-overlapping (address, bytes)
+        self.modifications = set()  # (address, half-byte length)
+        
+    @classmethod
+    def from_records(cls, lines):
+        """Build from H/T/M/E record lines"""
+        image = cls()
+        segments = SegmentMap()
+        
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+                
+            fields = line.split('^')
+            record_type = fields[0]
+            
+            if record_type == 'H':
+                image.name = fields[1].strip()
+                image.start = int(fields[2], 16)
+                image.length = int(fields[3], 16)
+            elif record_type == 'T':
+                # Adjacent or overlapping records merge; later records win
+                segments.add(int(fields[1], 16), bytes.fromhex(fields[3]))
+            elif record_type == 'M':
+                image.modifications.add((int(fields[1], 16), int(fields[2], 16)))
+            elif record_type == 'E':
+                image.entry = int(fields[1], 16) if len(fields) > 1 and fields[1] else 0
+                
+        image.segments = list(segments)
+        return image
+        
+    @classmethod
+    def from_file(cls, filename):
+        """Build from an object file on disk"""
+        with open(filename, 'r') as f:
+            return cls.from_records(f)
+            
+    @classmethod
+    def from_output(cls, generator):
+        """Build from an OutputGenerator that has emitted records in memory"""
+        return cls.from_records(generator.records)
+        
+    def size(self):
+        """Number of initialised bytes"""
+        return sum(len(data) for _, data in self.segments)
+        
+    def byte_map(self):
+        """Get {address: byte} for every initialised byte"""
+        result = {}
+        for start, data in self.segments:
+            result.update(zip(range(start, start + len(data)), data))
+        return result
+
+
+class ObjectDiff:
+    """Semantic differences between two object images"""
+    
+    def __init__(self):
+        self.header = []        # (field, value_a, value_b)
+        self.changed = []       # (start, end, bytes_a, bytes_b)
+        self.only_a = []        # (start, end)
+        self.only_b = []        # (start, end)
+        self.mods_only_a = []   # (address, length)
+        self.mods_only_b = []   # (address, length)
+        
+    def __bool__(self):
+        return bool(self.header or self.changed or self.only_a or self.only_b
+                    or self.mods_only_a or self.mods_only_b)
+                    
+    def report(self):
+        """Format differences as text lines"""
+        lines = []
+        for field, a, b in self.header:
+            lines.append(f"header {field}: {a} != {b}")
+        for start, end, a, b in self.changed:
+            lines.append(f"{start:06X}-{end - 1:06X}: differs "
+                         f"(A: {a.hex().upper()}  B: {b.hex().upper()})")
+        for start, end in self.only_a:
+            lines.append(f"{start:06X}-{end - 1:06X}: only in A ({end - start} bytes)")
+        for start, end in self.only_b:
+            lines.append(f"{start:06X}-{end - 1:06X}: only in B ({end - start} bytes)")
+        for address, length in self.mods_only_a:
+            lines.append(f"M {address:06X}^{length:02X}: only in A")
+        for address, length in self.mods_only_b:
+            lines.append(f"M {address:06X}^{length:02X}: only in B")
+        return lines
+
+
+def diff_images(a, b):
+    """Compare two ObjectImages by address range and M-record set"""
+    result = ObjectDiff()
+    
+    for field in ('name', 'start', 'length', 'entry'):
+        value_a = getattr(a, field)
+        value_b = getattr(b, field)
+        if value_a != value_b:
+            if isinstance(value_a, int):
+                value_a, value_b = f"{value_a:06X}", f"{value_b:06X}"
+            result.header.append((field, value_a, value_b))
+            
+    _diff_segments(a.segments, b.segments, result)
+    
+    result.mods_only_a = sorted(a.modifications - b.modifications)
+    result.mods_only_b = sorted(b.modifications - a.modifications)
+    return result
+
+
+def _diff_segments(segments_a, segments_b, result):
+    """Walk both sorted segment lists together"""
+    i = j = 0
+    # Current remaining piece of each side: (start, data)
+    piece_a = segments_a[0] if segments_a else None
+    piece_b = segments_b[0] if segments_b else None
+    
+    while piece_a is not None or piece_b is not None:
+        if piece_b is None or (piece_a is not None and
+                               piece_a[0] + len(piece_a[1]) <= piece_b[0]):
+            # A's piece ends before B's starts
+            _add_range(result.only_a, piece_a[0], piece_a[0] + len(piece_a[1]))
+            i += 1
+            piece_a = segments_a[i] if i < len(segments_a) else None
+            continue
+            
+        if piece_a is None or piece_b[0] + len(piece_b[1]) <= piece_a[0]:
+            _add_range(result.only_b, piece_b[0], piece_b[0] + len(piece_b[1]))
+            j += 1
+            piece_b = segments_b[j] if j < len(segments_b) else None
+            continue
+            
+        # Overlap: emit the non-overlapping head, then compare the common part
+        start_a, data_a = piece_a
+        start_b, data_b = piece_b
+        if start_a < start_b:
+            _add_range(result.only_a, start_a, start_b)
+            data_a = data_a[start_b - start_a:]
+            start_a = start_b
+        elif start_b < start_a:
+            _add_range(result.only_b, start_b, start_a)
+            data_b = data_b[start_a - start_b:]
+            start_b = start_a
+            
+        common = min(len(data_a), len(data_b))
+        _compare(start_a, data_a[:common], data_b[:common], result.changed)
+        
+        piece_a = (start_a + common, data_a[common:])
+        piece_b = (start_b + common, data_b[common:])
+        if not piece_a[1]:
+            i += 1
+            piece_a = segments_a[i] if i < len(segments_a) else None
+        if not piece_b[1]:
+            j += 1
+            piece_b = segments_b[j] if j < len(segments_b) else None
+
+
+def _add_range(ranges, start, end):
+    """Append [start, end), merging with the previous range if adjacent"""
+    if ranges and ranges[-1][1] == start:
+        ranges[-1] = (ranges[-1][0], end)
+    else:
+        ranges.append((start, end))
+
+
+def _compare(address, data_a, data_b, changed):
+    """Append runs of differing bytes between two equal-length buffers"""
+    if data_a == data_b:
+        return
+        
+    run_start = None
+    for offset in range(0, len(data_a), BLOCK_SIZE):
+        block_a = data_a[offset:offset + BLOCK_SIZE]
+        block_b = data_b[offset:offset + BLOCK_SIZE]
+        
+        if block_a == block_b:
+            if run_start is not None:
+                _close_run(address, run_start, offset, data_a, data_b, changed)
+                run_start = None
+            continue
+            
+        for k in range(len(block_a)):
+            position = offset + k
+            if block_a[k] != block_b[k]:
+                if run_start is None:
+                    run_start = position
+            elif run_start is not None:
+                _close_run(address, run_start, position, data_a, data_b, changed)
+                run_start = None
+                
+    if run_start is not None:
+        _close_run(address, run_start, len(data_a), data_a, data_b, changed)
+
+
+def _close_run(address, start, end, data_a, data_b, changed):
+    changed.append((address + start, address + end, data_a[start:end], data_b[start:end]))
+
+
+def test_objdiff():
+    """Test function for object diffing"""
+    print("Testing object diff...")
+    
+    # Same bytes, different T-record boundaries
+    a = ObjectImage.from_records([
+        "H^COPY  ^001000^000009",
+        "T^001000^09^0320260F2029000005",
+        "M^001001^05",
+        "E^001000",
+    ])
+    b = ObjectImage.from_records([
+        "H^COPY  ^001000^000009",
+        "T^001000^03^032026",
+        "T^001003^06^0F2029000005",
+        "M^001001^05",
+        "E^001000",
+    ])
+    same = diff_images(a, b)
+    print(f"\nRe-split records: {'identical' if not same else 'DIFFERENT'}")
+    
+    # One changed byte, one extra range and a missing M record
+    c = ObjectImage.from_records([
+        "H^COPY  ^001000^00000C",
+        "T^001000^09^0320260F2029000006",
+        "T^001010^02^ABCD",
+        "E^001000",
+    ])
+    different = diff_images(a, c)
+    print("Changed program:")
+    for line in different.report():
+        print(f"  {line}")
+        
+    if not same and len(different.changed) == 1 and different.only_b == [(0x1010, 0x1012)]:
+        print("\n✓ Object diff test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: objdiff.py <a.obj> <b.obj>")
+        return 2
+        
+    result = diff_images(ObjectImage.from_file(argv[0]), ObjectImage.from_file(argv[1]))
+    for line in result.report():
+        print(line)
+    return 1 if result else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    test_objdiff()
\ No newline at end of file
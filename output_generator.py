@@ -5,177 +5,186 @@ Generates object program file
 Team: Nadja
 """
 
+import os
+
+from fileutil import atomic_write
+from segments import SegmentMap
+
+
+def write_error(kind, filename, error):
+    """Message for a failed write, naming the target rather than the temp file"""
+    reason = getattr(error, 'strerror', None) or error
+    return f"Error writing {kind} file {filename}: {reason}"
+
 
 class OutputGenerator:
     """Generates object program in standard format"""
     
     def __init__(self):
         self.records = []
+        self.segments = None   # SegmentMap of the last emitted program
+        self.modifications = []  # Sorted (address, half-bytes) of the last program
+        self.write_errors = []   # Messages for files the last write_outputs() failed on
         
     def write_object_file(self, filename, instructions, symtab, pass2_obj):
         """Write complete object file"""
-        try:
-            with open(filename, 'w') as f:
-                # Generate Header record
-                header = self._generate_header(instructions)
-                f.write(header + '\n')
-                
-                # Generate Text records
-                text_records = self._generate_text_records(instructions)
-                for record in text_records:
-                    f.write(record + '\n')
-                    
-                # Generate Modification records
-                mod_records = self._generate_modification_records(pass2_obj)
-                for record in mod_records:
-                    f.write(record + '\n')
-                    
-                # Generate End record
-                end_record = self._generate_end_record(instructions)
-                f.write(end_record + '\n')
-                
-            return True
-            
-        except Exception as e:
-            print(f"Error writing object file: {e}")
-            return False
+        return self.write_outputs(filename, instructions, symtab, pass2_obj)
+        
+    def write_outputs(self, obj_filename, instructions, symtab, pass2_obj,
+                      listing_filename=None, xref=None, profile=None):
+        """Write object file and optional listing file from a single traversal
+        
+        Either filename may be None to skip that output. Returns False if a
+        file could not be written; the messages are kept in write_errors. Each file is built
+        in memory and written with one call to a temporary file that is then
+        renamed over the target, so readers never see a partial file.
+        If an XREF index is given, a cross-reference section is appended to
+        the listing, and likewise a Profiler's report.
+        """
+        obj_lines, lst_lines = self._emit(
+            instructions, pass2_obj,
+            want_object=obj_filename is not None,
+            want_listing=listing_filename is not None
+        )
+        
+        if listing_filename is not None and xref is not None:
+            lst_lines.extend(self._format_cross_reference(xref))
+        if listing_filename is not None and profile is not None:
+            lst_lines.extend(profile.report_lines())
             
-    def _generate_header(self, instructions):
-        """Generate Header record: H^name^start_addr^length"""
-        program_name = ""
-        start_addr = 0
-        program_length = 0
+        self.write_errors = []
         
-        # Find START directive
-        for instr in instructions:
-            if instr.mnemonic == 'START':
-                program_name = instr.label if instr.label else "PROG"
-                start_addr = instr.address
-                break
+        if obj_filename is not None:
+            try:
+                atomic_write(obj_filename, '\n'.join(obj_lines) + '\n')
+            except OSError as e:
+                self.write_errors.append(write_error('object', obj_filename, e))
                 
-        # Find program length
-        for instr in reversed(instructions):
-            if instr.mnemonic == 'END':
-                # Length is from start to last address
-                for i in reversed(instructions):
-                    if i.object_code and i.object_code != "ERROR":
-                        program_length = (i.address - start_addr) + (len(i.object_code) // 2)
-                        break
-                break
+        if listing_filename is not None:
+            try:
+                atomic_write(listing_filename, '\n'.join(lst_lines) + '\n')
+            except OSError as e:
+                self.write_errors.append(write_error('listing', listing_filename, e))
                 
-        # Format: H^name(6)^start(6)^length(6)
-        name = f"{program_name:<6s}"[:6]
-        return f"H^{name}^{start_addr:06X}^{program_length:06X}"
+        return not self.write_errors
         
-    def _generate_text_records(self, instructions):
-        """Generate Text records: T^start^length^object_codes"""
-        text_records = []
-        current_record = {
-            'start': None,
-            'codes': []
-        }
+    def _emit(self, instructions, pass2_obj, want_object=True, want_listing=False):
+        """Build object records and listing lines in one pass over instructions"""
+        program_name = ""
+        start_addr = 0
+        start_found = False
+        end_found = False
+        end_operand = ""
+        labels = {}
+        last_code_end = None
         
-        MAX_LENGTH = 60  # Max 60 hex chars (30 bytes)
+        segments = SegmentMap()
         
+        lst_lines = []
+        if want_listing:
+            lst_lines.append("LINE  LOC    OBJECT CODE   SOURCE STATEMENT")
+            lst_lines.append("====  ====   ===========   ================")
+            
+        listed_file = None
         for instr in instructions:
-            if not instr.object_code or instr.object_code == "ERROR":
-                # Flush current record if any
-                if current_record['codes']:
-                    text_records.append(self._format_text_record(current_record))
-                    current_record = {'start': None, 'codes': []}
-                continue
+            if want_listing:
+                # Included lines keep their own numbers: mark them with '+'
+                # and name the file each time the listing switches to one
+                if instr.source_file != listed_file:
+                    listed_file = instr.source_file
+                    if listed_file is not None:
+                        lst_lines.append(f"    +                       "
+                                         f"--- {os.path.basename(listed_file)}")
+                mark = "+" if instr.source_file else " "
+                line_num = f"{instr.line_num:4d}{mark}"
                 
-            # Skip directives that don't produce code
-            if instr.is_directive and instr.mnemonic in ['RESW', 'RESB']:
-                if current_record['codes']:
-                    text_records.append(self._format_text_record(current_record))
-                    current_record = {'start': None, 'codes': []}
+                if instr.is_comment:
+                    lst_lines.append(f"{line_num}                      {instr.original_line}")
+                else:
+                    loc = f"{instr.address:04X}" if instr.address else "    "
+                    obj_code = f"{instr.object_code:12s}" if instr.object_code else "            "
+                    source = f"{instr.label:8s} {instr.mnemonic:8s} {instr.operand}"
+                    lst_lines.append(f"{line_num} {loc}   {obj_code}   {source}")
+                    
+            if not want_object:
                 continue
                 
-            # Start new record if needed
-            if current_record['start'] is None:
-                current_record['start'] = instr.address
+            if instr.label and instr.label not in labels:
+                labels[instr.label] = instr.address
                 
-            # Check if adding this would exceed max length
-            current_length = sum(len(code) for code in current_record['codes'])
-            new_length = current_length + len(instr.object_code)
-            
-            if new_length > MAX_LENGTH:
-                # Flush current record and start new one
-                text_records.append(self._format_text_record(current_record))
-                current_record = {
-                    'start': instr.address,
-                    'codes': [instr.object_code]
-                }
-            else:
-                current_record['codes'].append(instr.object_code)
+            if instr.mnemonic == 'START' and not start_found:
+                start_found = True
+                program_name = instr.label if instr.label else "PROG"
+                start_addr = instr.address
+            elif instr.mnemonic == 'END' and not end_found:
+                end_found = True
+                end_operand = instr.operand
                 
-        # Flush remaining record
-        if current_record['codes']:
-            text_records.append(self._format_text_record(current_record))
+            code = instr.object_code
+            if not code or code == "ERROR":
+                continue
+                
+            data = bytes.fromhex(code)
+            segments.add(instr.address, data)
+            last_code_end = instr.address + len(data)
+            
+        if not want_object:
+            return [], lst_lines
             
-        return text_records
+        self.segments = segments
         
-    def _format_text_record(self, record):
-        """Format a text record"""
-        codes = ''.join(record['codes'])
-        length = len(codes) // 2  # Length in bytes
-        return f"T^{record['start']:06X}^{length:02X}^{codes}"
+        # Header: H^name(6)^start(6)^length(6)
+        program_length = 0
+        if end_found and last_code_end is not None:
+            program_length = last_code_end - start_addr
+        name = f"{program_name:<6s}"[:6]
+        
+        obj_lines = [f"H^{name}^{start_addr:06X}^{program_length:06X}"]
+        obj_lines.extend(segments.text_records())
+        obj_lines.extend(self._generate_modification_records(pass2_obj))
+        obj_lines.append(f"E^{labels.get(end_operand, 0):06X}")
+        
+        self.records = obj_lines
+        return obj_lines, lst_lines
         
     def _generate_modification_records(self, pass2_obj):
-        """Generate Modification records: M^address^length"""
-        mod_records = []
+        """Generate Modification records: M^address^length
+        
+        Records are sorted by address and duplicates dropped (load-and-go
+        may encode a backpatched line twice), so a loader does exactly one
+        fix-up per relocatable field.
+        """
+        modifications = set()
         
         if hasattr(pass2_obj, 'modification_records'):
             for mod in pass2_obj.modification_records:
-                addr = mod['address']
-                length = mod['length']
-                mod_records.append(f"M^{addr:06X}^{length:02X}")
+                modifications.add((mod['address'], mod['length']))
                 
-        return mod_records
+        self.modifications = sorted(modifications)
+        return [f"M^{addr:06X}^{length:02X}" for addr, length in self.modifications]
         
-    def _generate_end_record(self, instructions):
-        """Generate End record: E^first_exec_address"""
-        first_exec = 0
+    def _format_cross_reference(self, xref):
+        """Format the listing cross-reference section"""
+        lines = [
+            "",
+            "CROSS REFERENCE",
+            "SYMBOL   DEFINED  REFERENCES",
+            "======   =======  ==========",
+        ]
         
-        # Find END directive and get its operand
-        for instr in instructions:
-            if instr.mnemonic == 'END':
-                if instr.operand:
-                    # Look up the address of the operand
-                    for i in instructions:
-                        if i.label == instr.operand:
-                            first_exec = i.address
-                            break
-                break
-                
-        return f"E^{first_exec:06X}"
+        for symbol in sorted(xref.symbols()):
+            defined = xref.get_definition(symbol)
+            defined = f"{xref.format_location(defined):>7s}" if defined else "  UNDEF"
+            refs = ' '.join(f"{xref.format_location(where)}{xref.MARKERS.get(mode, '')}"
+                            for where, mode in xref.get_references(symbol))
+            lines.append(f"{symbol:8s} {defined}  {refs}")
+            
+        return lines
         
-    def generate_listing_file(self, filename, instructions):
+    def generate_listing_file(self, filename, instructions, xref=None):
         """Generate listing file with addresses and object code"""
-        try:
-            with open(filename, 'w') as f:
-                f.write("LINE  LOC    OBJECT CODE   SOURCE STATEMENT\n")
-                f.write("====  ====   ===========   ================\n")
-                
-                for instr in instructions:
-                    line_num = f"{instr.line_num:4d}"
-                    
-                    if instr.is_comment:
-                        f.write(f"{line_num}                       {instr.original_line}\n")
-                    else:
-                        loc = f"{instr.address:04X}" if instr.address else "    "
-                        obj_code = f"{instr.object_code:12s}" if instr.object_code else "            "
-                        
-                        source = f"{instr.label:8s} {instr.mnemonic:8s} {instr.operand}"
-                        
-                        f.write(f"{line_num}  {loc}   {obj_code}   {source}\n")
-                        
-            return True
-            
-        except Exception as e:
-            print(f"Error writing listing file: {e}")
-            return False
+        return self.write_outputs(None, instructions, None, None,
+                                  listing_filename=filename, xref=xref)
 
 
 def test_output_generator():
@@ -234,11 +243,12 @@ def test_output_generator():
     class MockPass2:
         modification_records = []
         
-    success = generator.write_object_file(
+    success = generator.write_outputs(
         'test_output.obj',
         instructions,
         None,
-        MockPass2()
+        MockPass2(),
+        listing_filename='test_output.lst'
     )
     
     if success:
@@ -247,8 +257,31 @@ def test_output_generator():
         with open('test_output.obj', 'r') as f:
             print(f.read())
             
-        import os
+        print("Listing:")
+        with open('test_output.lst', 'r') as f:
+            print(f.read())
+            
         os.remove('test_output.obj')
+        os.remove('test_output.lst')
+    else:
+        print("✗ Test failed")
+        
+    # A missing directory is reported against the real file name
+    failed = OutputGenerator()
+    written = failed.write_outputs(os.path.join('no_such_dir', 'x.obj'), instructions,
+                                   None, MockPass2())
+    print(f"Unwritable target: {failed.write_errors}")
+    
+    # Lines from an included file are marked and headed by the file's name
+    instructions[3].source_file = os.path.join('lib', 'data.asm')
+    _, lst_lines = OutputGenerator()._emit(instructions, MockPass2(), want_object=False,
+                                           want_listing=True)
+    included = [line for line in lst_lines if '+' in line[:5]]
+    print(f"Included listing lines: {included}")
+    marked = (len(included) == 2 and included[0].endswith('--- data.asm')
+              and included[1].startswith('   4+'))
+              
+    if success and not written and 'x.obj:' in failed.write_errors[0] and marked:
         print("✓ OutputGenerator test passed")
     else:
         print("✗ Test failed")
@@ -5,84 +5,281 @@ Builds symbol table and calculates addresses
 Team: Ilyas
 """
 
-from data_structures import SYMTAB, LITTAB
+from data_structures import SYMTAB, LITTAB, XREF, AddressingMode, classify_operand
+from constants import encode_byte
+from diagnostics import DiagnosticList, DEFAULT_MAX_DIAGNOSTICS
+from input_processor import find_block_end
+
+# SIC/XE addresses are 20 bits
+MEMORY_SIZE = 1 << 20
+
+# Conditional-assembly directives, handled before the normal directives
+CONDITIONALS = ('IF', 'ELSE', 'ENDIF')
+
+# IF operand: SYMBOL, or SYMBOL <op> VALUE with symbols and hex numbers.
+# Compiled by the first IF, so programs without one never import re.
+_CONDITION_PATTERN = r'^\s*(\w+)\s*(?:(==|=|!=|<>|<=|>=|<|>)\s*(\w+))?\s*$'
+_condition_regex = None
+
+_COMPARISONS = {
+    '=': lambda a, b: a == b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
 
 
 class Pass1Assembler:
     """Pass 1: Build symbol table and assign addresses"""
     
-    def __init__(self, instructions, optab):
+    def __init__(self, instructions, optab, symtab=None,
+                 max_errors=DEFAULT_MAX_DIAGNOSTICS):
         self.instructions = instructions
         self.optab = optab
-        self.symtab = SYMTAB()
+        self.symtab = symtab if symtab is not None else SYMTAB()
         self.littab = LITTAB()
+        self.xref = XREF()
         self.locctr = 0
         self.start_address = 0
         self.program_name = ""
         self.program_length = 0
-        self.errors = []
-        self.base_register = 0
+        self.errors = DiagnosticList(max_errors)
+        self.base_ranges = []
+        self.open_conditionals = []  # IF lines whose ENDIF is still to come
         
     def process(self):
-        """Execute Pass 1"""
-        # Find START directive
-        start_found = False
+        """Execute Pass 1
         
-        for i, instr in enumerate(self.instructions):
+        instructions may be a list or a lazy SourceReader. Lines inside a
+        disabled IF/ELSE branch are skipped, and self.instructions is
+        rebuilt as the list of lines actually kept.
+        """
+        lines = iter(self.instructions)
+        kept = []
+        started = False
+        
+        for instr in lines:
+            kept.append(instr)
             if instr.is_comment:
                 continue
                 
-            if instr.mnemonic == 'START':
-                start_found = True
-                self.program_name = instr.label
-                self.start_address = int(instr.operand, 16) if instr.operand else 0
-                self.locctr = self.start_address
-                instr.address = self.locctr
+            # START is only recognised as the first statement
+            if not started:
+                started = True
+                if instr.mnemonic == 'START':
+                    self.start(instr)
+                    continue
+                    
+            if instr.mnemonic in CONDITIONALS:
+                closing = self.conditional(instr, lines)
+                if closing is not None:
+                    kept.append(closing)
                 continue
                 
-            break
-            
-        if not start_found:
-            self.locctr = 0
-            self.start_address = 0
-            
-        # Process each instruction
-        for instr in self.instructions:
-            if instr.is_comment:
-                continue
+            if not self.step(instr):
+                break
                 
-            if instr.mnemonic == 'START':
-                continue
+        # Lines after END are kept for the listing
+        kept.extend(lines)
+        self.instructions = kept
+        
+        return self.finish()
+        
+    def conditional(self, instr, lines):
+        """Handle IF/ELSE/ENDIF, skipping a disabled branch of lines
+        
+        Returns the ELSE/ENDIF line that ended a skipped branch, or None.
+        """
+        instr.is_directive = True
+        
+        if instr.mnemonic == 'IF':
+            if self._condition(instr):
+                self.open_conditionals.append(instr)
+                return None
                 
-            if instr.mnemonic == 'END':
-                # Assign addresses to pending literals
-                self._process_literals()
-                instr.address = self.locctr
-                break
+            closing = self._skip_block(lines, True)
+            if closing is None:
+                self._unterminated(instr)
+                return None
                 
-            # Set address for this instruction
-            instr.address = self.locctr
+            closing.is_directive = True
+            if closing.mnemonic == 'ELSE':
+                self.open_conditionals.append(instr)
+            return closing
             
-            # Process label
-            if instr.label:
-                if not self.symtab.add_symbol(instr.label, self.locctr):
-                    self.errors.append(
-                        f"Line {instr.line_num}: Duplicate symbol '{instr.label}'"
-                    )
-                    
-            # Check for literal in operand
-            if instr.operand and instr.operand.startswith('='):
-                self.littab.add_literal(instr.operand)
+        if not self.open_conditionals:
+            self.errors.error(
+                'unmatched-conditional', instr.line_num,
+                "{} without IF", instr.mnemonic,
+                instr=instr, near=instr.mnemonic
+            )
+            return None
+            
+        opening = self.open_conditionals.pop()
+        if instr.mnemonic == 'ENDIF':
+            return None
+            
+        # ELSE after a taken IF branch: skip the ELSE branch
+        closing = self._skip_block(lines, False)
+        if closing is None:
+            self._unterminated(opening)
+            return None
+        closing.is_directive = True
+        return closing
+        
+    def _skip_block(self, lines, stop_at_else):
+        """Skip lines up to the ELSE/ENDIF closing this block"""
+        skip_block = getattr(lines, 'skip_block', None)
+        if skip_block is not None:
+            return skip_block(stop_at_else)
+            
+        # Already parsed lines: the same nesting scan over their mnemonics
+        skipped = []
+        
+        def mnemonics():
+            for instr in lines:
+                skipped.append(instr)
+                yield instr.mnemonic
                 
-            # Process instruction/directive
-            if self.optab.is_directive(instr.mnemonic):
-                self._process_directive(instr)
+        found, _ = find_block_end(mnemonics(), stop_at_else)
+        return skipped[found] if found >= 0 else None
+        
+    def _condition(self, instr):
+        """Evaluate an IF operand against EQU constants (False on error)"""
+        global _condition_regex
+        if _condition_regex is None:
+            import re
+            _condition_regex = re.compile(_CONDITION_PATTERN)
+            
+        match = _condition_regex.match(instr.operand)
+        if match is None:
+            self.errors.error(
+                'invalid-operand', instr.line_num,
+                "Invalid condition '{}'", instr.operand,
+                instr=instr, near=instr.operand
+            )
+            return False
+            
+        left, operator, right = match.groups()
+        left = self._condition_value(instr, left)
+        if operator is None:
+            return left is not None and left != 0
+            
+        right = self._condition_value(instr, right)
+        if left is None or right is None:
+            return False
+        return _COMPARISONS[operator](left, right)
+        
+    def _condition_value(self, instr, text):
+        """Value of a symbol (defined so far) or hex number in a condition"""
+        if self.symtab.exists(text):
+            self.xref.add_reference(text, instr.line_num, AddressingMode.SIMPLE,
+                                    instr.source_file)
+            return self.symtab.get_address(text)
+        try:
+            return int(text, 16)
+        except ValueError:
+            self.errors.error(
+                'undefined-symbol', instr.line_num,
+                "Undefined symbol '{}' in condition", text,
+                instr=instr, near=text
+            )
+            return None
+            
+    def _unterminated(self, instr):
+        self.errors.error(
+            'unterminated-conditional', instr.line_num,
+            "IF without ENDIF",
+            instr=instr, near=instr.mnemonic
+        )
+        
+    def start(self, instr):
+        """Handle the START directive: program name and load address"""
+        self.program_name = instr.label
+        if instr.label:
+            # END names the program; keep the cross-reference from calling it UNDEF
+            self.xref.add_definition(instr.label, instr.line_num, instr.source_file)
+        self.start_address = self._parse_address(instr)
+        self.locctr = self.start_address
+        instr.address = self.locctr
+        
+    def step(self, instr):
+        """Assign an address to one instruction and record what it defines
+        
+        Returns False once END has been processed.
+        """
+        if instr.is_comment:
+            return True
+            
+        if instr.mnemonic == 'START':
+            return True
+            
+        if instr.error:
+            # An INCLUDE/COPY line the input processor could not expand
+            instr.address = self.locctr
+            self.errors.error(
+                'invalid-include', instr.line_num, "{}", instr.error,
+                instr=instr, near=instr.mnemonic
+            )
+            instr.reported = True
+            return True
+            
+        if instr.mnemonic == 'END':
+            if instr.operand:
+                self._classify_operand(instr)
+            # Assign addresses to pending literals
+            instr.address = self.locctr
+            self._process_literals(instr)
+            return False
+            
+        # Set address for this instruction
+        instr.address = self.locctr
+        
+        # Process label (EQU labels are defined by the directive itself)
+        if instr.label and instr.mnemonic != 'EQU':
+            if not self.symtab.add_symbol(instr.label, self.locctr):
+                self._duplicate_symbol(instr)
             else:
-                self._process_instruction(instr)
+                self.xref.add_definition(instr.label, instr.line_num, instr.source_file)
                 
+        # Classify operand and record symbol references
+        if instr.operand:
+            self._classify_operand(instr)
+            
+        # Check for literal in operand
+        if instr.is_literal:
+            instr.literal_entry = self.littab.add_literal(
+                instr.target, self.locctr, self.optab.get_format(instr.mnemonic)
+            )
+        if instr.is_literal and instr.literal_entry is None:
+            self.errors.error(
+                'invalid-literal', instr.line_num,
+                "Invalid literal '{}'", instr.target,
+                instr=instr, near=instr.target
+            )
+            
+        # Process instruction/directive
+        if self.optab.is_directive(instr.mnemonic):
+            self._process_directive(instr)
+        else:
+            self._process_instruction(instr)
+            
+        return True
+        
+    def finish(self):
+        """Compute the program length and BASE ranges once every line is placed"""
+        while self.open_conditionals:
+            self._unterminated(self.open_conditionals.pop())
+            
         # Calculate program length
         self.program_length = self.locctr - self.start_address
         
+        self._resolve_base_ranges()
+        
         return self.symtab, self.littab, self.program_length
         
     def _process_instruction(self, instr):
@@ -91,16 +288,19 @@ class Pass1Assembler:
         format_num = self.optab.get_format(instr.mnemonic)
         
         if format_num == 0:
-            self.errors.append(
-                f"Line {instr.line_num}: Invalid mnemonic '{instr.mnemonic}'"
+            self.errors.error(
+                'invalid-mnemonic', instr.line_num,
+                "Invalid mnemonic '{}'", instr.mnemonic,
+                instr=instr, near=instr.mnemonic
             )
+            instr.reported = True  # Pass 2 stays quiet about the opcode
             return
             
         instr.format = format_num
         instr.is_directive = False
         
         # Increment LOCCTR by instruction size
-        self.locctr += format_num
+        self.locctr += self.optab.get_size(format_num)
         
     def _process_directive(self, instr):
         """Process an assembler directive"""
@@ -110,12 +310,12 @@ class Pass1Assembler:
         
         if mnemonic == 'RESW':
             # Reserve words
-            words = int(operand) if operand else 0
+            words = self._parse_count(instr)
             self.locctr += 3 * words
             
         elif mnemonic == 'RESB':
             # Reserve bytes
-            bytes_count = int(operand) if operand else 0
+            bytes_count = self._parse_count(instr)
             self.locctr += bytes_count
             
         elif mnemonic == 'WORD':
@@ -124,8 +324,7 @@ class Pass1Assembler:
             
         elif mnemonic == 'BYTE':
             # Byte constant
-            length = self._calculate_byte_length(operand)
-            self.locctr += length
+            self.locctr += self._byte_length(instr)
             
         elif mnemonic == 'BASE':
             # BASE directive (no space allocation)
@@ -137,23 +336,26 @@ class Pass1Assembler:
             
         elif mnemonic == 'LTORG':
             # Process pending literals
-            self._process_literals()
+            self._process_literals(instr)
             
         elif mnemonic == 'EQU':
             # EQU directive - assign value to symbol
             if instr.label:
+                # A number is an absolute constant; '*' is an address
+                relative = True
                 if operand == '*':
                     value = self.locctr
                 else:
                     try:
                         value = int(operand, 16)
+                        relative = False
                     except:
                         value = self.locctr
                         
-                if not self.symtab.add_symbol(instr.label, value):
-                    self.errors.append(
-                        f"Line {instr.line_num}: Duplicate symbol '{instr.label}'"
-                    )
+                if not self.symtab.add_symbol(instr.label, value, relative):
+                    self._duplicate_symbol(instr)
+                else:
+                    self.xref.add_definition(instr.label, instr.line_num, instr.source_file)
                     
         elif mnemonic == 'ORG':
             # ORG directive - change LOCCTR
@@ -161,43 +363,186 @@ class Pass1Assembler:
                 if operand == '*':
                     pass  # No change
                 else:
-                    try:
-                        self.locctr = int(operand, 16)
-                    except:
-                        pass
-                        
-    def _calculate_byte_length(self, operand):
-        """Calculate length of BYTE directive"""
-        if not operand:
+                    self.locctr = self._parse_address(instr)
+                    
+    def _parse_number(self, instr, base=10, default=0):
+        """Parse a numeric operand, reporting an error and recovering with default"""
+        if not instr.operand:
+            return default
+        try:
+            return int(instr.operand, base)
+        except ValueError:
+            self.errors.error(
+                'invalid-operand', instr.line_num,
+                "Invalid operand '{}' for {}", instr.operand, instr.mnemonic,
+                instr=instr, near=instr.operand
+            )
+            return default
+            
+    def _parse_count(self, instr):
+        """Parse a RESW/RESB count; a negative count is an error and reserves nothing"""
+        count = self._parse_number(instr)
+        if count < 0:
+            self.errors.error(
+                'invalid-operand', instr.line_num,
+                "Negative count '{}' for {}", instr.operand, instr.mnemonic,
+                instr=instr, near=instr.operand
+            )
             return 0
+        return count
+        
+    def _parse_address(self, instr):
+        """Parse a START/ORG address; one outside memory is an error and LOCCTR stays"""
+        address = self._parse_number(instr, 16, self.locctr)
+        if not 0 <= address < MEMORY_SIZE:
+            self.errors.error(
+                'invalid-operand', instr.line_num,
+                "{} address '{}' outside memory (0-{:X})", instr.mnemonic, instr.operand,
+                MEMORY_SIZE - 1,
+                instr=instr, near=instr.operand
+            )
+            return self.locctr
+        return address
+        
+    def _duplicate_symbol(self, instr):
+        """Report a symbol defined more than once"""
+        self.errors.error(
+            'duplicate-symbol', instr.line_num,
+            "Duplicate symbol '{}'", instr.label,
+            instr=instr, near=instr.label
+        )
+        
+    def _classify_operand(self, instr):
+        """Classify an operand once and index the symbol it references
+        
+        Format 3/4 instructions keep the result (addr_mode, target and
+        is_literal) so Pass 2 can encode without re-parsing the operand.
+        """
+        # BYTE constants and register operands hold no symbols
+        if instr.mnemonic in ('BYTE', 'START'):
+            return
+        format_num = self.optab.get_format(instr.mnemonic)
+        if format_num in (1, 2):
+            return
             
-        if operand.startswith("C'"):
-            # Character constant: C'EOF' = 3 bytes
-            content = operand[2:-1]  # Remove C' and '
-            return len(content)
+        mode, target, is_literal = classify_operand(instr.operand)
+        
+        if format_num:
+            instr.addr_mode = mode
+            instr.target = target
+            instr.is_literal = is_literal
+            
+            if (mode in (AddressingMode.IMMEDIATE, AddressingMode.INDIRECT)
+                    and ',' in instr.operand):
+                self.errors.error(
+                    'invalid-addressing', instr.line_num,
+                    "Indexing cannot be combined with immediate or indirect "
+                    "addressing in '{}'", instr.operand,
+                    instr=instr, near=instr.operand
+                )
+                
+        if not is_literal and isinstance(target, str) and target[:1].isalpha():
+            self.xref.add_reference(target, instr.line_num, mode, instr.source_file)
+            
+    def _byte_length(self, instr):
+        """Calculate length of BYTE directive"""
+        if not instr.operand:
+            return 0
             
-        elif operand.startswith("X'"):
-            # Hex constant: X'05' = 1 byte (2 hex digits = 1 byte)
-            content = operand[2:-1]  # Remove X' and '
-            return (len(content) + 1) // 2
+        constant = encode_byte(instr.operand)
+        if constant is None:
+            self.errors.error(
+                'invalid-operand', instr.line_num,
+                "Invalid operand '{}' for BYTE", instr.operand,
+                instr=instr, near=instr.operand
+            )
+            return 1
             
-        return 1
+        return constant.length
+        
+    def _resolve_base_ranges(self):
+        """Attach the BASE range in effect to every Format 3/4 instruction
         
-    def _process_literals(self):
-        """Assign addresses to pending literals"""
-        pending = self.littab.get_pending()
+        Runs once the symbol table is complete, so BASE may name a symbol
+        defined later. Each range is a dict holding the base value, the
+        addresses [start, end) it covers and the line of its BASE; a range
+        lasts until the next BASE, NOBASE or END. Instructions outside any
+        range keep base_range None, so Pass 2 can encode each instruction
+        on its own without tracking a base register in source order.
+        """
+        current = None
+        
+        for instr in self.instructions:
+            if instr.is_comment:
+                continue
+                
+            mnemonic = instr.mnemonic
+            if mnemonic in ('BASE', 'NOBASE', 'END'):
+                if current is not None:
+                    current['end'] = instr.address
+                    current = None
+                    
+                if mnemonic == 'END':
+                    break
+                    
+                if mnemonic == 'BASE':
+                    value = self._base_value(instr)
+                    if value is not None:
+                        current = {
+                            'base': value,
+                            'start': instr.address,
+                            'end': instr.address,
+                            'line': instr.line_num,
+                        }
+                        self.base_ranges.append(current)
+                        instr.base_range = current
+                continue
+                
+            if instr.format in (3, 4):
+                instr.base_range = current
+                
+        if current is not None:
+            current['end'] = self.locctr
+            
+    def _base_value(self, instr):
+        """Resolve a BASE operand (symbol, * or hex address), or None"""
+        operand = instr.operand
         
-        for literal in pending:
-            self.littab.assign_address(literal, self.locctr)
-            length = self.littab.get_length(literal)
-            self.locctr += length
+        if not operand:
+            self.errors.error(
+                'invalid-operand', instr.line_num,
+                "BASE requires an operand",
+                instr=instr
+            )
+            return None
+            
+        if operand == '*':
+            return instr.address
+        if self.symtab.exists(operand):
+            return self.symtab.get_address(operand)
+            
+        try:
+            return int(operand, 16)
+        except ValueError:
+            self.errors.error(
+                'undefined-symbol', instr.line_num,
+                "Undefined symbol '{}' in BASE", operand,
+                instr=instr, near=operand
+            )
+            return None
+            
+    def _process_literals(self, instr):
+        """Assign addresses to pending literals, recording the pool on instr"""
+        pool, self.locctr = self.littab.place_pending(self.locctr)
+        if pool:
+            instr.literal_pool = pool
 
 
 def test_pass1():
     """Test function for Pass 1"""
     print("Testing Pass 1...")
     
-    from data_structures import Instruction, OPTAB
+    from data_structures import Instruction, OPTAB, SortedSYMTAB
     
     # Create test instructions
     instructions = [
@@ -221,17 +566,75 @@ def test_pass1():
         
     # Run Pass 1
     optab = OPTAB()
-    pass1 = Pass1Assembler(instructions, optab)
+    pass1 = Pass1Assembler(instructions, optab, SortedSYMTAB())
     symtab, littab, length = pass1.process()
     
     print(f"\nProgram Length: {length:04X}")
     print(f"\nSymbol Table ({len(symtab)} symbols):")
-    for symbol, addr in sorted(symtab.symbols.items()):
+    for symbol, addr in symtab.sorted_by_name():
         print(f"  {symbol:8s} {addr:04X}")
         
-    if pass1.errors:
+    print(f"\nNearest symbol to 1008: {symtab.nearest(0x1008)}")
+    print(f"Symbols starting with 'B': {symtab.complete('B')}")
+    
+    print("\nCross References:")
+    for symbol in sorted(pass1.xref.symbols()):
+        refs = [f"{pass1.xref.format_location(where)}({mode.name.lower()})"
+                for where, mode in pass1.xref.get_references(symbol)]
+        defined = pass1.xref.get_definition(symbol)
+        defined = pass1.xref.format_location(defined) if defined else "nowhere"
+        print(f"  {symbol:8s} defined {defined}, "
+              f"referenced {', '.join(refs)}")
+              
+    # Conditional assembly: only the MODEL=2 branch is kept
+    conditional = [
+        processor.parse_line(line, i) for i, line in enumerate([
+            "PROG    START   0",
+            "MODEL   EQU     2",
+            "        IF      MODEL=2",
+            "        LDA     #2",
+            "        ELSE",
+            "        LDA     #1",
+            "        ENDIF",
+            "        END     PROG",
+        ], 1)
+    ]
+    pass1_if = Pass1Assembler(conditional, optab)
+    _, _, length = pass1_if.process()
+    kept = [instr.operand for instr in pass1_if.instructions if instr.mnemonic == 'LDA']
+    print(f"\nConditional assembly kept {kept}, length {length}")
+    if kept != ['#2'] or length != 3:
+        print("✗ Conditional assembly failed")
+        
+    # A negative reservation is rejected and reserves nothing
+    negative = [
+        processor.parse_line(line, i) for i, line in enumerate([
+            "PROG    START   -10",
+            "BUF     RESB    -3",
+            "        ORG     -10",
+            "        ORG     100000",
+            "        END     PROG",
+        ], 1)
+    ]
+    pass1_neg = Pass1Assembler(negative, optab)
+    _, _, length = pass1_neg.process()
+    print(f"\nSTART -10, RESB -3, ORG -10, ORG 100000: {[str(e) for e in pass1_neg.errors]}, "
+          f"length {length}")
+    if [e.code for e in pass1_neg.errors] != ['invalid-operand'] * 4 or length != 0:
+        print("✗ Negative START/RESB/ORG failed")
+        
+    # An unknown mnemonic is still an unknown mnemonic when Pass 1 runs again
+    unknown = [processor.parse_line("        FOO     1", 1)]
+    Pass1Assembler(unknown, optab).process()
+    rerun = Pass1Assembler(unknown, optab)
+    rerun.process()
+    print(f"Unknown mnemonic on a second run: {[e.code for e in rerun.errors]}")
+    if [e.code for e in rerun.errors] != ['invalid-mnemonic']:
+        print("✗ Second run misreported the mnemonic")
+        
+    if pass1.errors or pass1_if.errors:
         print("\nErrors:")
-        for error in pass1.errors:
+        for error in list(pass1.errors) + list(pass1_if.errors):
             print(f"  {error}")
     else:
         print("\n✓ Pass 1 test passed")
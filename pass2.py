@@ -5,253 +5,351 @@ Generates object code
 Team: Nadja
 """
 
-from data_structures import get_register_code
+from constants import encode_byte, encode_word
+from data_structures import MODE_FLAGS, classify_operand
+from diagnostics import DiagnosticList, DEFAULT_MAX_DIAGNOSTICS
+
+
+# Format 3/4 relative addressing, selecting the b, p and e flags
+DIRECT = 0
+PC_RELATIVE = 1
+BASE_RELATIVE = 2
+EXTENDED = 3
+
+# Format 2 instructions whose second operand is a shift count
+SHIFT_MNEMONICS = frozenset(('SHIFTL', 'SHIFTR'))
+
+BPE_FLAGS = {
+    DIRECT: 0b000,
+    PC_RELATIVE: 0b010,
+    BASE_RELATIVE: 0b100,
+    EXTENDED: 0b001,
+}
+
+
+def _build_flag_table():
+    """Precompute the 12-bit opcode+nixbpe prefix of every Format 3/4 encoding
+    
+    Indexed by ((opcode | ni) << 3) | (x << 2) | relative, so encoding an
+    instruction is one list lookup plus the displacement/address bits.
+    """
+    table = [0] * (256 << 3)
+    for first_byte in range(256):
+        for x in (0, 1):
+            for relative, bpe in BPE_FLAGS.items():
+                table[(first_byte << 3) | (x << 2) | relative] = \
+                    (first_byte << 4) | (x << 3) | bpe
+    return table
+
+
+FLAG_TABLE = _build_flag_table()
 
 
 class Pass2Assembler:
     """Pass 2: Generate object code"""
     
-    def __init__(self, instructions, symtab, littab, optab):
+    # Encoder method for each instruction format. Instruction sets with
+    # extra formats can add entries with register_encoder().
+    ENCODERS = {
+        1: '_generate_format1',
+        2: '_generate_format2',
+        3: '_generate_format3',
+        4: '_generate_format4',
+    }
+    
+    def __init__(self, instructions, symtab, littab, optab,
+                 max_errors=DEFAULT_MAX_DIAGNOSTICS):
         self.instructions = instructions
         self.symtab = symtab
         self.littab = littab
         self.optab = optab
-        self.errors = []
-        self.base_register = 0
+        self.errors = DiagnosticList(max_errors)
         self.modification_records = []
+        self.bases_used = set()  # Lines of BASE directives that were used
+        self.encoders = {
+            format_num: getattr(self, name)
+            for format_num, name in self.ENCODERS.items()
+        }
+        
+    def register_encoder(self, format_num, encoder):
+        """Use encoder(instr, opcode) for instructions of format_num"""
+        self.encoders[format_num] = encoder
         
     def process(self):
         """Execute Pass 2"""
         for instr in self.instructions:
-            if instr.is_comment or instr.mnemonic in ['START', 'END']:
-                continue
-                
-            # Handle BASE directive
-            if instr.mnemonic == 'BASE':
-                if instr.operand:
-                    if self.symtab.exists(instr.operand):
-                        self.base_register = self.symtab.get_address(instr.operand)
-                    else:
-                        try:
-                            self.base_register = int(instr.operand, 16)
-                        except:
-                            pass
-                continue
-                
-            if instr.mnemonic == 'NOBASE':
-                self.base_register = 0
-                continue
-                
-            # Generate object code for instructions
-            if not instr.is_directive:
-                self._generate_instruction_code(instr)
-            else:
-                self._generate_directive_code(instr)
+            self.step(instr)
+            if instr.mnemonic == 'END' and not instr.is_comment:
+                break  # Later lines are only listed, as in Pass 1
                 
+        self._check_unused_bases()
         return self.instructions
         
+    def step(self, instr):
+        """Generate object code for one instruction already placed by Pass 1
+        
+        Each instruction is encoded on its own, so instructions can be
+        encoded in any order once their operands are defined.
+        """
+        if instr.is_comment or instr.mnemonic == 'START':
+            return
+            
+        if instr.mnemonic == 'END':
+            # Literals still pending at END are placed here
+            self._generate_literal_pool(instr)
+            return
+            
+        # Generate object code for instructions
+        if not instr.is_directive:
+            self._generate_instruction_code(instr)
+        else:
+            self._generate_directive_code(instr)
+            
     def _generate_instruction_code(self, instr):
         """Generate object code for an instruction"""
         opcode = self.optab.get_opcode(instr.mnemonic)
         
         if opcode is None:
-            self.errors.append(
-                f"Line {instr.line_num}: Invalid opcode '{instr.mnemonic}'"
+            if instr.reported:
+                return  # Pass 1 reported the line
+            self.errors.error(
+                'invalid-opcode', instr.line_num,
+                "Invalid opcode '{}'", instr.mnemonic,
+                instr=instr, near=instr.mnemonic
             )
             return
             
-        format_num = instr.format
+        encoder = self.encoders.get(instr.format)
         
-        if format_num == 1:
-            # Format 1: just opcode (8 bits)
-            instr.object_code = f"{opcode:02X}"
-            
-        elif format_num == 2:
-            # Format 2: opcode + registers (16 bits)
-            self._generate_format2(instr, opcode)
-            
-        elif format_num in [3, 4]:
-            # Format 3/4: opcode + nixbpe + address/displacement
-            self._generate_format34(instr, opcode, format_num)
+        if encoder is None:
+            self.errors.error(
+                'unsupported-format', instr.line_num,
+                "No encoder for format {} ('{}')", instr.format, instr.mnemonic,
+                instr=instr, near=instr.mnemonic
+            )
+            return
             
+        encoder(instr, opcode)
+        
+    def _generate_format1(self, instr, opcode):
+        """Generate Format 1 object code: just opcode (8 bits)"""
+        instr.object_code = f"{opcode:02X}"
+        
+    def _generate_format3(self, instr, opcode):
+        """Generate Format 3 object code: opcode + nixbpe + 12-bit displacement"""
+        self._generate_format34(instr, opcode, 3)
+        
+    def _generate_format4(self, instr, opcode):
+        """Generate Format 4 object code: opcode + nixbpe + 20-bit address"""
+        self._generate_format34(instr, opcode, 4)
+        
     def _generate_format2(self, instr, opcode):
-        """Generate Format 2 object code"""
-        operands = instr.operand.split(',')
+        """Generate Format 2 object code
         
-        r1 = 0
-        r2 = 0
+        Operands are registers, except SVC n (r1 = n) and the shift count
+        of SHIFTL/SHIFTR r1,n (r2 = n - 1).
+        """
+        operands = [operand.strip() for operand in instr.operand.split(',')]
+        mnemonic = instr.mnemonic
         
-        if len(operands) >= 1 and operands[0]:
-            r1_code = get_register_code(operands[0].strip())
-            if r1_code is not None:
-                r1 = r1_code
-                
-        if len(operands) >= 2:
-            r2_code = get_register_code(operands[1].strip())
-            if r2_code is not None:
-                r2 = r2_code
+        fields = [0, 0]
+        for i, text in enumerate(operands[:2]):
+            if not text:
+                continue
+            if mnemonic == 'SVC' and i == 0:
+                value = self._format2_number(text, 0, 15)
+            elif mnemonic in SHIFT_MNEMONICS and i == 1:
+                value = self._format2_number(text, 1, 16)
+                if value is not None:
+                    value -= 1
+            else:
+                value = self.optab.get_register_code(text)
                 
-        instr.object_code = f"{opcode:02X}{r1:01X}{r2:01X}"
+            if value is None:
+                self.errors.error(
+                    'invalid-operand', instr.line_num,
+                    "Invalid operand '{}' for {}", text, mnemonic,
+                    instr=instr, near=text
+                )
+                instr.object_code = "ERROR"
+                return
+            fields[i] = value
+            
+        instr.object_code = f"{opcode:02X}{fields[0]:01X}{fields[1]:01X}"
+        
+    def _format2_number(self, text, low, high):
+        """Decimal Format 2 count in [low, high], or None"""
+        if not text.isdigit():
+            return None
+        value = int(text)
+        return value if low <= value <= high else None
         
     def _generate_format34(self, instr, opcode, format_num):
         """Generate Format 3/4 object code"""
-        # Determine addressing mode flags
-        ni = self._get_ni_flags(instr.operand)
-        x = 1 if ',X' in instr.operand.upper() else 0
-        
-        # Get target address
+        mode = instr.addr_mode
+        if mode is None:
+            # Not classified by Pass 1 (hand-built instruction list)
+            mode, instr.target, instr.is_literal = classify_operand(instr.operand)
+            instr.addr_mode = mode
+            
+        ni, x = MODE_FLAGS[mode]
+        target = instr.target
         target_address = self._resolve_address(instr)
         
         if target_address is None:
-            self.errors.append(
-                f"Line {instr.line_num}: Undefined symbol in '{instr.operand}'"
+            self.errors.error(
+                'undefined-symbol', instr.line_num,
+                "Undefined symbol in '{}'", instr.operand,
+                instr=instr, near=instr.operand
             )
             instr.object_code = "ERROR"
             return
             
+        key = ((opcode | ni) << 3) | (x << 2)
+        
         if format_num == 4:
-            # Format 4: e=1, b=0, p=0, 20-bit address
-            b = 0
-            p = 0
-            e = 1
-            
-            nixbpe = (ni << 4) | (x << 3) | (b << 2) | (p << 1) | e
-            
-            # Combine: opcode(6) + ni(2) + x(1) + b(1) + p(1) + e(1) + address(20)
-            first_byte = opcode + (ni >> 2)  # opcode + n bit
-            second_byte = ((ni & 0x03) << 6) | (nixbpe & 0x3F)
+            # Format 4: e=1, 20-bit address
+            word = (FLAG_TABLE[key | EXTENDED] << 20) | (target_address & 0xFFFFF)
+            instr.object_code = f"{word:08X}"
             
-            instr.object_code = f"{first_byte:02X}{second_byte:02X}{target_address:05X}"
-            
-            # Add modification record for Format 4
-            self.modification_records.append({
-                'address': instr.address + 1,
-                'length': 5
-            })
+            # Only an address field moves with the program; constants
+            # (+LDT #4096) and absolute EQU symbols are left alone
+            if instr.is_literal or self.symtab.is_relative(target):
+                self.modification_records.append({
+                    'address': instr.address + 1,
+                    'length': 5
+                })
+            return
             
+        if (target is None or (type(target) is int and 0 <= target <= 4095)
+                or (not instr.is_literal and target in self.symtab.absolute
+                    and 0 <= target_address <= 4095)):
+            # No operand or small constant (a number or an absolute EQU
+            # symbol): use it directly (b=0, p=0), so it does not depend on
+            # where the program is loaded
+            relative = DIRECT
+            disp = target_address
         else:
-            # Format 3: calculate displacement
-            pc = instr.address + 3  # PC points to next instruction
-            
-            # Try PC-relative first
-            disp = target_address - pc
+            # Try PC-relative first (PC points to next instruction)
+            disp = target_address - (instr.address + 3)
+            base_range = instr.base_range
             
             if -2048 <= disp <= 2047:
-                # PC-relative
-                b = 0
-                p = 1
-                e = 0
-                disp = disp & 0xFFF  # 12-bit two's complement
+                relative = PC_RELATIVE
                 
-            elif self.base_register != 0:
-                # Try base-relative
-                disp = target_address - self.base_register
+            elif base_range is not None:
+                # Try base-relative, using the BASE Pass 1 found in effect here
+                disp = target_address - base_range['base']
                 
                 if 0 <= disp <= 4095:
-                    b = 1
-                    p = 0
-                    e = 0
+                    relative = BASE_RELATIVE
+                    self.bases_used.add(base_range['line'])
                 else:
-                    self.errors.append(
-                        f"Line {instr.line_num}: Displacement out of range"
+                    self.errors.error(
+                        'displacement-range', instr.line_num,
+                        "Displacement out of range",
+                        instr=instr, near=instr.operand
                     )
                     instr.object_code = "ERROR"
                     return
             else:
-                self.errors.append(
-                    f"Line {instr.line_num}: Displacement out of range (no base register)"
+                self.errors.error(
+                    'displacement-range', instr.line_num,
+                    "Displacement out of range (no base register)",
+                    instr=instr, near=instr.operand
                 )
                 instr.object_code = "ERROR"
                 return
                 
-            nixbpe = (ni << 4) | (x << 3) | (b << 2) | (p << 1) | e
-            
-            # Combine: opcode(6) + nixbpe(6) + disp(12)
-            first_byte = opcode + (ni >> 2)
-            second_byte = ((ni & 0x03) << 6) | (nixbpe & 0x3F)
-            
-            instr.object_code = f"{first_byte:02X}{second_byte:02X}{disp:03X}"
-            
-    def _get_ni_flags(self, operand):
-        """Determine n and i flags from operand"""
-        if not operand:
-            return 0b11  # Simple addressing (ni = 11)
-            
-        # Remove ,X for checking
-        operand_clean = operand.split(',')[0].strip()
+        # Combine: flag table prefix (opcode + nixbpe) + 12-bit displacement
+        word = (FLAG_TABLE[key | relative] << 12) | (disp & 0xFFF)
+        instr.object_code = f"{word:06X}"
         
-        if operand_clean.startswith('#'):
-            # Immediate addressing (ni = 01)
-            return 0b01
-        elif operand_clean.startswith('@'):
-            # Indirect addressing (ni = 10)
-            return 0b10
-        else:
-            # Simple addressing (ni = 11)
-            return 0b11
-            
-    def _resolve_address(self, instr):
-        """Resolve operand to target address"""
-        operand = instr.operand
+    def write_debug_file(self, filename, source=""):
+        """Write symbols and the address-to-line table to a binary debug file
         
-        if not operand:
-            return 0
-            
-        # Remove addressing mode prefixes and indexed suffix
-        operand_clean = operand.replace('#', '').replace('@', '')
-        operand_clean = operand_clean.split(',')[0].strip()
+        See debugfile.py; source names the main source file.
+        """
+        from debugfile import write_debug_file
         
-        # Check if literal
-        if operand_clean.startswith('='):
-            return self.littab.get_address(operand_clean)
-            
-        # Check if immediate value (numeric)
-        if operand.startswith('#'):
-            try:
-                # Try to parse as number
-                if operand_clean.isdigit():
-                    return int(operand_clean)
-                else:
-                    # It's a symbol
-                    return self.symtab.get_address(operand_clean)
-            except:
-                return self.symtab.get_address(operand_clean)
+        return write_debug_file(filename, self.instructions, self.symtab,
+                                self.littab, source)
+                                
+    def _check_unused_bases(self):
+        """Warn about BASE directives no instruction needed"""
+        for instr in self.instructions:
+            if (instr.mnemonic == 'BASE' and instr.base_range is not None
+                    and instr.line_num not in self.bases_used):
+                self.errors.warning(
+                    'unused-base', instr.line_num,
+                    "BASE {} is never used: every instruction in its range "
+                    "reaches its target PC-relative or with Format 4", instr.operand,
+                    instr=instr, near=instr.operand
+                )
                 
-        # It's a symbol
-        return self.symtab.get_address(operand_clean)
+    def _resolve_address(self, instr):
+        """Resolve a classified operand to its target address"""
+        target = instr.target
+        
+        if target is None:
+            return 0
+        if instr.is_literal:
+            if instr.literal_entry is not None:
+                return instr.literal_entry['address']
+            return self.littab.get_address(target)
+        if type(target) is int:
+            return target
+        return self.symtab.get_address(target)
         
     def _generate_directive_code(self, instr):
         """Generate object code for directives that produce data"""
         if instr.mnemonic == 'WORD':
             # Generate 3-byte word
-            try:
-                value = int(instr.operand)
-                if value < 0:
-                    value = (1 << 24) + value  # Two's complement
-                instr.object_code = f"{value:06X}"
-            except:
-                instr.object_code = "000000"
+            constant = encode_word(instr.operand)
+            if constant:
+                instr.object_code = constant.hex
+            elif self.symtab.exists(instr.operand):
+                self._generate_word_symbol(instr)
+            elif instr.operand[:1].isalpha():
+                self.errors.error(
+                    'undefined-symbol', instr.line_num,
+                    "Undefined symbol in '{}'", instr.operand,
+                    instr=instr, near=instr.operand
+                )
+                instr.object_code = "ERROR"
+            else:
+                # Out of range (WORD 99999999) or not a number (WORD 12AB)
+                self.errors.error(
+                    'invalid-operand', instr.line_num,
+                    "Invalid WORD value '{}'", instr.operand,
+                    instr=instr, near=instr.operand
+                )
+                instr.object_code = "ERROR"
                 
         elif instr.mnemonic == 'BYTE':
             # Generate byte constant
-            instr.object_code = self._generate_byte_code(instr.operand)
+            constant = encode_byte(instr.operand)
+            instr.object_code = constant.hex if constant else ""
             
-    def _generate_byte_code(self, operand):
-        """Generate object code for BYTE directive"""
-        if operand.startswith("C'"):
-            # Character constant
-            content = operand[2:-1]
-            result = ""
-            for char in content:
-                result += f"{ord(char):02X}"
-            return result
+        elif instr.mnemonic == 'LTORG':
+            self._generate_literal_pool(instr)
             
-        elif operand.startswith("X'"):
-            # Hex constant
-            content = operand[2:-1]
-            return content
+    def _generate_word_symbol(self, instr):
+        """WORD holding a symbol's value, relocated if it is an address"""
+        symbol = instr.operand
+        instr.object_code = f"{self.symtab.get_address(symbol) & 0xFFFFFF:06X}"
+        if self.symtab.is_relative(symbol):
+            self.modification_records.append({
+                'address': instr.address,
+                'length': 6
+            })
             
-        return ""
+    def _generate_literal_pool(self, instr):
+        """Generate object code for the literals placed at an LTORG/END"""
+        if instr.literal_pool:
+            instr.object_code = ''.join(
+                entry['data'].hex().upper() for entry in instr.literal_pool
+            )
 
 
 def test_pass2():
@@ -285,7 +383,9 @@ def test_pass2():
     instructions[2].address = 0x1003
     instructions[2].format = 3
     instructions[3].address = 0x1006
+    instructions[3].is_directive = True
     instructions[4].address = 0x1009
+    instructions[4].is_directive = True
     
     symtab = SYMTAB()
     symtab.add_symbol('FIRST', 0x1000)
@@ -305,9 +405,64 @@ def test_pass2():
             print(f"  {instr.address:04X}  {instr.object_code:8s}  "
                   f"{instr.mnemonic}")
                   
-    if pass2.errors:
+    # M records only for relocatable fields
+    from pass1 import Pass1Assembler
+    lines = [
+        "PROG    START   0",
+        "SIZE    EQU     1000",
+        "        +LDT    #4096",
+        "        +LDA    #SIZE",
+        "        +JSUB   SUB",
+        "SUB     WORD    SUB",
+        "        WORD    SIZE",
+        "SMALL   EQU     10",
+        "        LDA     #SMALL",
+        "        WORD    99999999",
+        "        WORD    12AB",
+        "        END     PROG",
+    ]
+    program = [processor.parse_line(line, i) for i, line in enumerate(lines, 1)]
+    pass1 = Pass1Assembler(program, optab)
+    relocating = Pass2Assembler(program, *pass1.process()[:2], optab)
+    relocating.process()
+    mods = [(mod['address'], mod['length']) for mod in relocating.modification_records]
+    print(f"\nModification records: {[f'{a:06X}^{n:02X}' for a, n in mods]}")
+    
+    # An absolute EQU symbol is encoded directly, not PC-relative
+    direct = program[8].object_code
+    print(f"LDA #SMALL (absolute EQU 10): {direct}")
+    
+    # Overflowing and non-numeric WORD values are errors, not 000000
+    invalid = [error.line_num for error in relocating.errors]
+    print(f"Invalid WORD lines: {invalid}")
+    
+    # Format 2 operands are checked; an unknown mnemonic is reported by Pass 1
+    # only, and lines after END are not assembled
+    lines = [
+        "PROG    START   0",
+        "        ADDR    A,S",
+        "        ADDR    A,Q",
+        "        SHIFTL  A,4",
+        "        SVC     2",
+        "        FOO     1",
+        "        END     PROG",
+        "        LTORG",
+        "        WORD    12AB",
+    ]
+    program = [processor.parse_line(line, i) for i, line in enumerate(lines, 1)]
+    pass1 = Pass1Assembler(program, optab)
+    checked = Pass2Assembler(program, *pass1.process()[:2], optab)
+    checked.process()
+    format2 = [instr.object_code for instr in program[1:5]]
+    reported = [(e.code, e.line_num) for e in list(pass1.errors) + list(checked.errors)]
+    print(f"Format 2 codes: {format2}, reported: {reported}")
+    
+    if (pass2.errors or invalid != [10, 11] or mods != [(0x9, 5), (0xC, 6)]
+            or direct != '010010'
+            or format2 != ['9004', 'ERROR', 'A403', 'B020']
+            or reported != [('invalid-mnemonic', 6), ('invalid-operand', 3)]):
         print("\nErrors:")
-        for error in pass2.errors:
+        for error in list(pass2.errors) + list(relocating.errors):
             print(f"  {error}")
     else:
         print("\n✓ Pass 2 test passed")
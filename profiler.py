@@ -0,0 +1,346 @@
+"""
+Static Profiler for SIC/XE Assembler
+Estimates code size and cycle cost of an assembled program by basic block
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import json
+import sys
+
+from data_structures import AddressingMode
+
+# Instructions that end a basic block
+JUMPS = {'J', 'JEQ', 'JGT', 'JLT', 'JSUB', 'RSUB'}
+CONDITIONAL_JUMPS = {'JEQ', 'JGT', 'JLT'}
+
+# A block nested in d loops is assumed to run LOOP_WEIGHT ** d times
+LOOP_WEIGHT = 10
+
+
+class BasicBlock:
+    """Straight-line run of instructions entered only at the top"""
+    
+    def __init__(self, index, first):
+        self.index = index
+        self.instructions = [first]
+        self.start = first.address
+        self.end = first.address     # Address after the last instruction
+        self.size = 0
+        self.cycles = 0
+        self.successors = []         # Indexes of blocks control can reach
+        self.loop_depth = 0
+        
+    @property
+    def label(self):
+        return self.instructions[0].label
+        
+    @property
+    def last(self):
+        return self.instructions[-1]
+        
+    @property
+    def weighted_cycles(self):
+        return self.cycles * LOOP_WEIGHT ** self.loop_depth
+        
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'label': self.label,
+            'start': self.start,
+            'end': self.end,
+            'size': self.size,
+            'cycles': self.cycles,
+            'loop_depth': self.loop_depth,
+            'weighted_cycles': self.weighted_cycles,
+            'successors': self.successors,
+            'line': self.instructions[0].line_num,
+        }
+
+
+class Profiler:
+    """Basic-block size and cycle estimates for a program after Pass 2"""
+    
+    def __init__(self, instructions, symtab, optab):
+        self.instructions = instructions
+        self.symtab = symtab
+        self.optab = optab
+        self.blocks = []
+        self.loops = []        # dicts: header, latch, label, start, end, size, cycles
+        self.shrinkable = []   # dicts: line, address, instruction, reason
+        
+    def analyse(self):
+        """Build blocks, find loops and Format 4 candidates; returns self"""
+        code = [instr for instr in self.instructions if self._is_code(instr)]
+        self._build_blocks(code)
+        self._link_blocks()
+        self._find_loops()
+        self._find_shrinkable(code)
+        return self
+        
+    def _is_code(self, instr):
+        return (not instr.is_comment and not instr.is_directive and instr.format
+                and instr.object_code and instr.object_code != "ERROR")
+                
+    def _jump_target(self, instr):
+        """Address a jump goes to, or None if unknown (indirect, RSUB)"""
+        if instr.mnemonic.lstrip('+') == 'RSUB':
+            return None
+        if instr.addr_mode == AddressingMode.INDIRECT:
+            return None
+        return self._target_address(instr)
+        
+    def _target_address(self, instr):
+        target = instr.target
+        if target is None:
+            return None
+        if instr.is_literal:
+            entry = instr.literal_entry
+            return entry['address'] if entry is not None else None
+        if type(target) is int:
+            return target
+        return self.symtab.get_address(target)
+        
+    def _build_blocks(self, code):
+        """Split code at jump targets, after jumps and at gaps (data)"""
+        leaders = set()
+        for instr in code:
+            if instr.mnemonic.lstrip('+') in JUMPS:
+                target = self._jump_target(instr)
+                if target is not None:
+                    leaders.add(target)
+                    
+        block = None
+        for instr in code:
+            size = len(instr.object_code) // 2
+            cycles = self.optab.get_cycles(
+                instr.mnemonic, instr.format,
+                instr.addr_mode == AddressingMode.INDIRECT
+            )
+            
+            if (block is None or instr.address in leaders
+                    or instr.address != block.end
+                    or block.last.mnemonic.lstrip('+') in JUMPS):
+                block = BasicBlock(len(self.blocks), instr)
+                self.blocks.append(block)
+            else:
+                block.instructions.append(instr)
+                
+            block.end = instr.address + size
+            block.size += size
+            block.cycles += cycles
+            
+    def _link_blocks(self):
+        """Fill in successors from fall-through and jump targets"""
+        by_start = {block.start: block.index for block in self.blocks}
+        
+        for block in self.blocks:
+            mnemonic = block.last.mnemonic.lstrip('+')
+            following = block.index + 1
+            falls_through = (following < len(self.blocks)
+                             and self.blocks[following].start == block.end)
+                             
+            if mnemonic in ('J', 'JSUB') or mnemonic in CONDITIONAL_JUMPS:
+                target = by_start.get(self._jump_target(block.last))
+                if target is not None and mnemonic != 'JSUB':
+                    block.successors.append(target)
+                if mnemonic != 'J' and falls_through:
+                    block.successors.append(following)
+            elif mnemonic != 'RSUB' and falls_through:
+                block.successors.append(following)
+                
+    def _find_loops(self):
+        """Treat backward jumps as loops over the blocks they span
+        
+        Back edges to the same header form one loop, ending at the
+        furthest latch.
+        """
+        latches = {}
+        for block in self.blocks:
+            for successor in block.successors:
+                if successor <= block.index:
+                    latches[successor] = max(latches.get(successor, 0), block.index)
+                    
+        for header, latch in sorted(latches.items()):
+            span = self.blocks[header:latch + 1]
+            for member in span:
+                member.loop_depth += 1
+            self.loops.append({
+                'header': header,
+                'latch': latch,
+                'label': self.blocks[header].label,
+                'start': self.blocks[header].start,
+                'end': self.blocks[latch].end,
+                'size': sum(member.size for member in span),
+                'cycles': sum(member.cycles for member in span),
+            })
+            
+    def _find_shrinkable(self, code):
+        """Format 4 instructions whose operand a Format 3 encoding can reach"""
+        for instr in code:
+            if instr.format != 4:
+                continue
+                
+            address = self._target_address(instr)
+            if address is None:
+                continue
+                
+            target = instr.target
+            reason = None
+            constant = type(target) is int or (
+                not instr.is_literal and target in self.symtab.absolute)
+            if constant and 0 <= address <= 4095:
+                reason = "constant fits in 12 bits"
+            elif -2048 <= address - (instr.address + 3) <= 2047:
+                reason = "target within PC-relative range"
+            elif (instr.base_range is not None
+                  and 0 <= address - instr.base_range['base'] <= 4095):
+                reason = "target within BASE range"
+                
+            if reason:
+                self.shrinkable.append({
+                    'line': instr.line_num,
+                    'address': instr.address,
+                    'instruction': f"{instr.mnemonic} {instr.operand}".strip(),
+                    'reason': reason,
+                })
+                
+    def totals(self):
+        return {
+            'blocks': len(self.blocks),
+            'size': sum(block.size for block in self.blocks),
+            'cycles': sum(block.cycles for block in self.blocks),
+            'weighted_cycles': sum(block.weighted_cycles for block in self.blocks),
+            'loops': len(self.loops),
+            'shrinkable': len(self.shrinkable),
+        }
+        
+    def to_dict(self):
+        return {
+            'totals': self.totals(),
+            'blocks': [block.to_dict() for block in self.blocks],
+            'loops': self.loops,
+            'format4_shrinkable': self.shrinkable,
+        }
+        
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+        
+    def report_lines(self, top=10):
+        """Text report, formatted like the listing's other sections"""
+        totals = self.totals()
+        weighted = totals['weighted_cycles'] or 1
+        
+        lines = [
+            "",
+            "PROFILE",
+            f"{totals['blocks']} blocks, {totals['size']} bytes of code, "
+            f"{totals['cycles']} cycles straight-line, {totals['loops']} loop(s)",
+            "",
+            "BLOCK  START  SIZE  CYCLES  DEPTH  SHARE  LABEL",
+            "=====  =====  ====  ======  =====  =====  =====",
+        ]
+        ranked = sorted(self.blocks, key=lambda b: b.weighted_cycles, reverse=True)
+        for block in ranked[:top]:
+            share = 100 * block.weighted_cycles / weighted
+            lines.append(f"{block.index:5d}  {block.start:05X}  {block.size:4d}  "
+                         f"{block.cycles:6d}  {block.loop_depth:5d}  {share:4.0f}%  "
+                         f"{block.label}")
+                         
+        if self.loops:
+            lines.extend([
+                "",
+                "LOOP    START  END    SIZE  CYCLES/ITERATION",
+                "====    =====  =====  ====  ================",
+            ])
+            for loop in sorted(self.loops, key=lambda l: l['cycles'], reverse=True):
+                lines.append(f"{loop['label'] or '-':8s}{loop['start']:05X}  "
+                             f"{loop['end']:05X}  {loop['size']:4d}  {loop['cycles']:6d}")
+                             
+        if self.shrinkable:
+            lines.extend([
+                "",
+                "FORMAT 4 -> FORMAT 3 (saves 1 byte and 1 cycle each)",
+                "LINE  LOC    INSTRUCTION           REASON",
+                "====  =====  ===========           ======",
+            ])
+            for entry in self.shrinkable:
+                lines.append(f"{entry['line']:4d}  {entry['address']:05X}  "
+                             f"{entry['instruction']:20s}  {entry['reason']}")
+                             
+        return lines
+
+
+def profile(pass2):
+    """Profile the program a Pass2Assembler has just encoded"""
+    return Profiler(pass2.instructions, pass2.symtab, pass2.optab).analyse()
+
+
+def test_profiler():
+    """Test function for the profiler"""
+    print("Testing profiler...")
+    
+    from data_structures import OPTAB
+    from input_processor import InputProcessor
+    from pass1 import Pass1Assembler
+    from pass2 import Pass2Assembler
+    
+    lines = [
+        "SUM     START   1000",
+        "FIRST   CLEAR   A",
+        "        CLEAR   X",
+        "LOOP    ADD     TABLE,X",
+        "        TIX     #30",
+        "        JLT     LOOP",
+        "        +STA    TOTAL",
+        "        RSUB",
+        "TABLE   RESW    10",
+        "TOTAL   RESW    1",
+        "        END     FIRST",
+    ]
+    processor = InputProcessor()
+    instructions = [processor.parse_line(line, i) for i, line in enumerate(lines, 1)]
+    
+    optab = OPTAB()
+    pass1 = Pass1Assembler(instructions, optab)
+    symtab, littab, _ = pass1.process()
+    pass2 = Pass2Assembler(pass1.instructions, symtab, littab, optab)
+    pass2.process()
+    
+    result = profile(pass2)
+    for line in result.report_lines():
+        print(line)
+        
+    loop_found = len(result.loops) == 1 and result.loops[0]['label'] == 'LOOP'
+    if loop_found and len(result.shrinkable) == 1 and len(result.blocks) == 3:
+        print("\n✓ Profiler test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+def main(argv=None):
+    import argparse
+    from assembler import assemble_file
+    
+    parser = argparse.ArgumentParser(description="Static cycle/size profile of a SIC/XE program")
+    parser.add_argument('source', help="Assembly source file")
+    parser.add_argument('--json', action='store_true', help="Print the profile as JSON")
+    parser.add_argument('--top', type=int, default=10, help="Blocks to show (default: 10)")
+    args = parser.parse_args(argv)
+    
+    result = assemble_file(args.source, write_output=False)
+    for error in result.errors:
+        print(error, file=sys.stderr)
+        
+    analysis = profile(result.pass2)
+    if args.json:
+        print(analysis.to_json())
+    else:
+        print('\n'.join(analysis.report_lines(args.top)))
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    test_profiler()
\ No newline at end of file
@@ -0,0 +1,424 @@
+"""
+Golden-Output Regression Harness for SIC/XE Assembler
+Assembles test*.asm plus a generated stress corpus and compares against golden files
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+# Paths are relative to this file, so the harness runs from any directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, 'golden')
+
+# Timing baselines depend on the machine, so they are kept next to the
+# golden files but not committed (see .gitignore)
+TIMINGS_FILE = 'timings.local.json'
+
+# Generated programs: name -> (random seed, number of code blocks)
+STRESS_CASES = {
+    'stress_small': (1, 8),
+    'stress_large': (2, 25),
+}
+
+# A case is only flagged as slower when it exceeds its baseline by both
+# the relative tolerance and this many seconds
+MIN_SLOWDOWN = 0.005
+
+
+class Case:
+    """One source program checked by the harness"""
+    
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+        
+    def cost(self):
+        """Rough relative cost used to balance shards"""
+        return os.path.getsize(self.source)
+        
+    def __repr__(self):
+        return f"Case({self.name})"
+
+
+class CaseResult:
+    """Outputs and timing of one assembled case"""
+    
+    def __init__(self, name, object_text, listing_text, seconds, diagnostics):
+        self.name = name
+        self.object_text = object_text
+        self.listing_text = listing_text
+        self.seconds = seconds
+        self.diagnostics = diagnostics
+        
+    @property
+    def diagnostics_text(self):
+        """Diagnostics as the .diag golden file stores them, one per line"""
+        return ''.join(line + '\n' for line in self.diagnostics)
+
+
+def generate_stress_source(seed, blocks):
+    """Deterministic SIC/XE program exercising every format and directive
+    
+    Each block is a run of code followed by an LTORG pool and a small data
+    area, so all PC-relative references stay within range however many
+    blocks are generated.
+    """
+    rng = random.Random(seed)
+    memory_ops = ['LDA', 'STA', 'ADD', 'SUB', 'COMP', 'LDX', 'STX', 'LDT', 'STT',
+                  'LDS', 'STS', 'AND', 'OR', 'MUL', 'DIV', 'TIX', 'STL', 'LDL']
+    register_ops = ['ADDR', 'SUBR', 'COMPR', 'RMO', 'MULR']
+    registers = ['A', 'X', 'L', 'B', 'S', 'T']
+    jumps = ['J', 'JEQ', 'JGT', 'JLT']
+    
+    lines = [
+        f". Generated stress program (seed {seed}, {blocks} blocks)",
+        "STRESS  START   0",
+        "FIRST   LDB     #DATA0",
+        "        BASE    DATA0",
+    ]
+    
+    for block in range(blocks):
+        words = [f"D{block}W{i}" for i in range(rng.randint(4, 10))]
+        code_labels = []
+        lines.append(f"B{block}      CLEAR   X")
+        
+        for i in range(rng.randint(60, 140)):
+            label = ""
+            if rng.random() < 0.1:
+                label = f"C{block}L{i}"
+                
+            kind = rng.random()
+            if kind < 0.45:
+                operand = rng.choice(words)
+                if rng.random() < 0.15:
+                    operand += ",X"
+                elif rng.random() < 0.1:
+                    operand = "@" + operand
+                statement = f"{rng.choice(memory_ops)} {operand}"
+            elif kind < 0.55:
+                statement = f"{rng.choice(['LDA', 'COMP', 'ADD'])} #{rng.randint(0, 4095)}"
+            elif kind < 0.65:
+                literal = rng.choice([
+                    f"=C'{rng.choice(['EOF', 'OK', 'Z'])}'",
+                    f"=X'{rng.randint(0, 255):02X}'",
+                    f"={rng.randint(0, 9999)}",
+                ])
+                statement = f"{rng.choice(['LDA', 'COMP', 'LDCH'])} {literal}"
+            elif kind < 0.8:
+                statement = (f"{rng.choice(register_ops)} "
+                             f"{rng.choice(registers)},{rng.choice(registers)}")
+            elif kind < 0.87:
+                statement = f"+{rng.choice(['LDA', 'STA', 'JSUB'])} B{rng.randrange(blocks)}"
+            elif kind < 0.95 and code_labels:
+                statement = f"{rng.choice(jumps)} {rng.choice(code_labels)}"
+            else:
+                statement = f"{rng.choice(jumps)} N{block}"
+                
+            lines.append(f"{label:8s}{statement}")
+            if label:
+                code_labels.append(label)
+                
+        lines.append(f"        J       N{block}")
+        lines.append("        LTORG")
+        lines.append(f"DATA{block}   WORD    {rng.randint(0, 99999)}")
+        for name in words:
+            if rng.random() < 0.2:
+                lines.append(f"{name:8s}BYTE    C'{rng.choice(['ABC', 'HELLO', 'X'])}'")
+            elif rng.random() < 0.2:
+                lines.append(f"{name:8s}RESW    {rng.randint(1, 8)}")
+            else:
+                lines.append(f"{name:8s}WORD    {rng.randint(-5000, 99999)}")
+        lines.append(f"N{block}      NORM")
+        
+    lines.append("        RSUB")
+    lines.append("        END     FIRST")
+    return '\n'.join(lines) + '\n'
+
+
+def collect_cases(corpus_dir):
+    """test*.asm next to this file plus the generated stress corpus"""
+    cases = [
+        Case(os.path.splitext(os.path.basename(path))[0], path)
+        for path in sorted(glob.glob(os.path.join(HERE, 'test*.asm')))
+    ]
+    
+    for name, (seed, blocks) in STRESS_CASES.items():
+        path = os.path.join(corpus_dir, name + '.asm')
+        with open(path, 'w') as f:
+            f.write(generate_stress_source(seed, blocks))
+        cases.append(Case(name, path))
+        
+    return cases
+
+
+def shard_cases(cases, count):
+    """Split cases into count shards of roughly equal cost
+    
+    Largest first, each into the currently lightest shard.
+    """
+    shards = [[] for _ in range(max(1, count))]
+    loads = [0] * len(shards)
+    
+    for case in sorted(cases, key=Case.cost, reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(case)
+        loads[lightest] += case.cost()
+        
+    return [shard for shard in shards if shard]
+
+
+def run_case(case, repeat=3):
+    """Assemble one case; timing is the best of `repeat` runs"""
+    from assembler import assemble_file
+    from data_structures import OPTAB
+    
+    optab = OPTAB()
+    with tempfile.TemporaryDirectory() as scratch:
+        object_path = os.path.join(scratch, case.name + '.obj')
+        listing_path = os.path.join(scratch, case.name + '.lst')
+        
+        best = None
+        for _ in range(max(1, repeat)):
+            result = assemble_file(case.source, output=object_path,
+                                   listing=listing_path, optab=optab)
+            if best is None or result.elapsed < best:
+                best = result.elapsed
+                
+        with open(object_path) as f:
+            object_text = f.read()
+        with open(listing_path) as f:
+            listing_text = f.read()
+            
+    return CaseResult(case.name, object_text, listing_text, best,
+                      [str(error) for error in result.errors])
+
+
+def benchmark_pass2(blocks, repeat=3, seed=2):
+    """Time Pass 2 alone on a generated program of `blocks` code blocks
+    
+    Pass 1 runs untimed before each run. Returns (instructions encoded,
+    Format 3/4 instructions among them, best Pass 2 time in seconds).
+    """
+    from data_structures import OPTAB
+    from input_processor import InputProcessor
+    from pass1 import Pass1Assembler
+    from pass2 import Pass2Assembler
+    
+    optab = OPTAB()
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'bench.asm')
+        with open(path, 'w') as f:
+            f.write(generate_stress_source(seed, blocks))
+            
+        best = None
+        for _ in range(max(1, repeat)):
+            pass1 = Pass1Assembler(InputProcessor().open_source(path), optab)
+            symtab, littab, _ = pass1.process()
+            pass2 = Pass2Assembler(pass1.instructions, symtab, littab, optab)
+            start = time.perf_counter()
+            pass2.process()
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+                
+    encoded = [instr for instr in pass1.instructions
+               if not instr.is_comment and not instr.is_directive]
+    extended = sum(1 for instr in encoded if instr.format in (3, 4))
+    return len(encoded), extended, best
+
+
+def run_shard(args):
+    """Worker entry point: run every case of one shard"""
+    shard, repeat = args
+    return [run_case(case, repeat) for case in shard]
+
+
+def run_cases(cases, jobs, repeat=3):
+    """Run cases across `jobs` worker processes; results in case order"""
+    shards = shard_cases(cases, jobs)
+    
+    if len(shards) <= 1:
+        results = run_shard((cases, repeat))
+    else:
+        with Pool(len(shards)) as pool:
+            results = [
+                result
+                for shard_results in pool.imap_unordered(
+                    run_shard, [(shard, repeat) for shard in shards]
+                )
+                for result in shard_results
+            ]
+            
+    order = {case.name: i for i, case in enumerate(cases)}
+    return sorted(results, key=lambda result: order[result.name])
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def compare_result(result, golden_dir):
+    """Get a list of problems with result against its golden files"""
+    from objdiff import ObjectImage, diff_images
+    
+    problems = []
+    
+    golden_object = _read(os.path.join(golden_dir, result.name + '.obj'))
+    if golden_object is None:
+        problems.append("no golden .obj (run with --update)")
+    elif golden_object != result.object_text:
+        difference = diff_images(
+            ObjectImage.from_records(golden_object.splitlines()),
+            ObjectImage.from_records(result.object_text.splitlines())
+        )
+        report = difference.report() or ["record layout changed, bytes identical"]
+        problems.append("object program differs (A = golden, B = now):")
+        problems.extend("  " + line for line in report[:10])
+        
+    golden_listing = _read(os.path.join(golden_dir, result.name + '.lst'))
+    if golden_listing is None:
+        problems.append("no golden .lst (run with --update)")
+    elif golden_listing != result.listing_text:
+        diff = difflib.unified_diff(
+            golden_listing.splitlines(), result.listing_text.splitlines(),
+            'golden', 'now', lineterm='', n=0
+        )
+        problems.append("listing differs:")
+        problems.extend("  " + line for line in list(diff)[:12])
+        
+    golden_diagnostics = _read(os.path.join(golden_dir, result.name + '.diag'))
+    if golden_diagnostics is None:
+        problems.append("no golden .diag (run with --update)")
+    elif golden_diagnostics != result.diagnostics_text:
+        diff = difflib.unified_diff(
+            golden_diagnostics.splitlines(), result.diagnostics,
+            'golden', 'now', lineterm='', n=0
+        )
+        problems.append("diagnostics differ:")
+        problems.extend("  " + line for line in list(diff)[:12])
+        
+    return problems
+
+
+def check_timing(result, baselines, tolerance):
+    """Get a message if result is slower than its baseline, else None"""
+    baseline = baselines.get(result.name)
+    if baseline is None:
+        return None
+    if (result.seconds > baseline * (1 + tolerance)
+            and result.seconds - baseline > MIN_SLOWDOWN):
+        return (f"slower: {result.seconds * 1000:.1f} ms vs baseline "
+                f"{baseline * 1000:.1f} ms")
+    return None
+
+
+def update_golden(results, golden_dir):
+    """Rewrite golden outputs and this machine's timing baselines from results"""
+    os.makedirs(golden_dir, exist_ok=True)
+    for result in results:
+        with open(os.path.join(golden_dir, result.name + '.obj'), 'w') as f:
+            f.write(result.object_text)
+        with open(os.path.join(golden_dir, result.name + '.lst'), 'w') as f:
+            f.write(result.listing_text)
+        with open(os.path.join(golden_dir, result.name + '.diag'), 'w') as f:
+            f.write(result.diagnostics_text)
+            
+    timings = {result.name: round(result.seconds, 6) for result in results}
+    with open(os.path.join(golden_dir, TIMINGS_FILE), 'w') as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_timings(golden_dir):
+    path = os.path.join(golden_dir, TIMINGS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Golden-output regression tests")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--shard', metavar='K/N',
+                        help="Only run the K-th of N slices of the cases (1-based)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs per case; the fastest is timed (default: 3)")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed slowdown over baseline, as a fraction (default: 0.5)")
+    parser.add_argument('--strict-timing', action='store_true',
+                        help="Fail on timing regressions instead of only reporting them")
+    parser.add_argument('--update', action='store_true',
+                        help="Rewrite golden files and timing baselines")
+    parser.add_argument('--golden', default=GOLDEN_DIR, help="Golden file directory")
+    parser.add_argument('-k', dest='pattern', help="Only run cases whose name contains this")
+    parser.add_argument('--bench-pass2', type=int, nargs='?', const=2000, metavar='BLOCKS',
+                        help="Only time Pass 2 on a generated program (default: 2000 "
+                             "blocks, about 200k instructions)")
+    args = parser.parse_args(argv)
+    
+    if args.bench_pass2 is not None:
+        count, extended, seconds = benchmark_pass2(args.bench_pass2, args.repeat)
+        print(f"Pass 2: {count} instructions ({extended} Format 3/4) in "
+              f"{seconds * 1000:.1f} ms, {seconds / max(1, count) * 1e6:.2f} us per instruction")
+        return 0
+        
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        cases = collect_cases(corpus_dir)
+        if args.pattern:
+            cases = [case for case in cases if args.pattern in case.name]
+        if args.shard:
+            index, count = (int(part) for part in args.shard.split('/'))
+            cases = cases[index - 1::count]
+            
+        start = time.perf_counter()
+        results = run_cases(cases, args.jobs, args.repeat)
+        wall = time.perf_counter() - start
+        
+    if args.update:
+        update_golden(results, args.golden)
+        print(f"Updated {len(results)} golden case(s) in {args.golden}/")
+        return 0
+        
+    baselines = load_timings(args.golden)
+    failed = 0
+    slow = 0
+    
+    for result in results:
+        problems = compare_result(result, args.golden)
+        timing = check_timing(result, baselines, args.tolerance)
+        
+        status = "FAIL" if problems else "ok"
+        print(f"{status:4s}  {result.name:14s} {result.seconds * 1000:8.1f} ms")
+        for problem in problems:
+            print(f"      {problem}")
+        if timing:
+            print(f"      {timing}")
+            slow += 1
+        failed += bool(problems)
+        
+    print(f"\n{len(results) - failed} passed, {failed} failed, {slow} slower than "
+          f"baseline ({wall:.2f} s, {args.jobs} job(s))")
+          
+    if failed or (slow and args.strict_timing):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Segment Map for SIC/XE Assembler
+Sparse interval map of initialised bytes, merged by adjacency
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+from bisect import bisect_right
+
+# Bytes per T record (60 hex characters)
+TEXT_RECORD_BYTES = 30
+
+
+class SegmentMap:
+    """Sorted, non-overlapping runs of initialised bytes
+    
+    RESW/RESB areas and ORG jumps leave gaps that are never stored, so
+    memory use follows the number of initialised bytes rather than the
+    address span. Adjacent or overlapping writes are merged into one
+    segment; where they overlap, the later write wins.
+    """
+    
+    def __init__(self):
+        self._starts = []   # Segment start addresses, ascending
+        self._data = []     # bytearray for each start
+        
+    @classmethod
+    def from_instructions(cls, instructions):
+        """Build from instructions that Pass 2 has given object code"""
+        segments = cls()
+        for instr in instructions:
+            code = instr.object_code
+            if code and code != "ERROR" and not instr.is_comment:
+                segments.add(instr.address, bytes.fromhex(code))
+        return segments
+        
+    @classmethod
+    def from_records(cls, lines):
+        """Build from the T records of an object program"""
+        segments = cls()
+        for line in lines:
+            fields = line.strip().split('^')
+            if fields[0] == 'T':
+                try:
+                    data = bytes.fromhex(fields[3])
+                except (IndexError, ValueError):
+                    raise ValueError(f"Malformed text record: {line.strip()}")
+                segments.add(int(fields[1], 16), data)
+        return segments
+        
+    def add(self, address, data):
+        """Store bytes at an absolute address"""
+        if not data:
+            return
+        starts = self._starts
+        end = address + len(data)
+        
+        # Fast path: code arrives in address order almost all the time
+        if not starts or address > starts[-1] + len(self._data[-1]):
+            starts.append(address)
+            self._data.append(bytearray(data))
+            return
+        if address == starts[-1] + len(self._data[-1]):
+            self._data[-1].extend(data)
+            return
+            
+        # First segment ending at or after address, last starting at or before end
+        first = bisect_right(starts, address) - 1
+        if first < 0 or starts[first] + len(self._data[first]) < address:
+            first += 1
+        last = bisect_right(starts, end) - 1
+        
+        if first > last:
+            starts.insert(first, address)
+            self._data.insert(first, bytearray(data))
+            return
+            
+        merged_start = min(starts[first], address)
+        merged_end = max(end, starts[last] + len(self._data[last]))
+        merged = bytearray(merged_end - merged_start)
+        for i in range(first, last + 1):
+            offset = starts[i] - merged_start
+            merged[offset:offset + len(self._data[i])] = self._data[i]
+        merged[address - merged_start:end - merged_start] = data
+        
+        starts[first:last + 1] = [merged_start]
+        self._data[first:last + 1] = [merged]
+        
+    def __iter__(self):
+        """Yield (start address, bytes) in address order"""
+        for start, data in zip(self._starts, self._data):
+            yield start, bytes(data)
+            
+    def __len__(self):
+        return len(self._starts)
+        
+    def __bool__(self):
+        return bool(self._starts)
+        
+    def size(self):
+        """Number of initialised bytes"""
+        return sum(len(data) for data in self._data)
+        
+    def span(self):
+        """Get (lowest address, address after the highest byte), or None"""
+        if not self._starts:
+            return None
+        return self._starts[0], self._starts[-1] + len(self._data[-1])
+        
+    def read(self, address, length):
+        """Get length bytes from address; gaps read as zero"""
+        result = bytearray(length)
+        end = address + length
+        i = max(0, bisect_right(self._starts, address) - 1)
+        
+        while i < len(self._starts) and self._starts[i] < end:
+            start = self._starts[i]
+            data = self._data[i]
+            low = max(start, address)
+            high = min(start + len(data), end)
+            if low < high:
+                result[low - address:high - address] = data[low - start:high - start]
+            i += 1
+            
+        return bytes(result)
+        
+    def text_records(self, max_bytes=TEXT_RECORD_BYTES):
+        """Format segments as T records of at most max_bytes each"""
+        records = []
+        for start, data in zip(self._starts, self._data):
+            for offset in range(0, len(data), max_bytes):
+                chunk = data[offset:offset + max_bytes]
+                records.append(f"T^{start + offset:06X}^{len(chunk):02X}^{chunk.hex().upper()}")
+        return records
+        
+    def load_into(self, memory, origin=0):
+        """Copy every segment into a bytearray-like memory loaded at origin
+        
+        Addresses below origin or beyond the end of memory are skipped.
+        Returns the number of bytes copied.
+        """
+        copied = 0
+        for start, data in zip(self._starts, self._data):
+            low = max(start, origin)
+            high = min(start + len(data), origin + len(memory))
+            if low < high:
+                memory[low - origin:high - origin] = data[low - start:high - start]
+                copied += high - low
+        return copied
+        
+    def to_image(self, origin=None):
+        """Flat bytearray from origin (default: lowest address) to the last byte"""
+        span = self.span()
+        if span is None:
+            return bytearray()
+        if origin is None:
+            origin = span[0]
+        image = bytearray(max(0, span[1] - origin))
+        self.load_into(image, origin)
+        return image
+        
+    def write_binary(self, filename, origin=None):
+        """Write a flat binary image, seeking over gaps instead of writing zeros
+        
+        On filesystems with sparse file support the gaps take no space.
+        """
+        span = self.span()
+        if origin is None:
+            origin = span[0] if span else 0
+        with open(filename, 'wb') as f:
+            for start, data in zip(self._starts, self._data):
+                low = max(start, origin)
+                if low >= start + len(data):
+                    continue
+                f.seek(low - origin)
+                f.write(data[low - start:])
+            if span is not None and span[1] > origin:
+                f.truncate(span[1] - origin)
+
+
+def test_segments():
+    """Test function for the segment map"""
+    print("Testing segment map...")
+    
+    segments = SegmentMap()
+    segments.add(0x1000, bytes.fromhex('141033'))
+    segments.add(0x1003, bytes.fromhex('482039'))   # Adjacent: extends
+    segments.add(0x9000, bytes.fromhex('454F46'))   # After a large RESB gap
+    segments.add(0x5000, bytes.fromhex('0000FF'))   # ORG back into the gap
+    segments.add(0x4FFE, bytes.fromhex('AABBCC'))   # Overlaps and merges
+    segments.add(0x1002, bytes.fromhex('34'))       # Overwrites one byte
+    
+    print(f"\nSegments: {[(f'{s:04X}', d.hex().upper()) for s, d in segments]}")
+    print(f"Initialised bytes: {segments.size()}, span: {segments.span()}")
+    
+    long_run = SegmentMap()
+    long_run.add(0, bytes(range(70)))
+    records = long_run.text_records()
+    for record in records:
+        print(f"  {record[:24]}...")
+        
+    expected = [
+        (0x1000, bytes.fromhex('141034482039')),
+        (0x4FFE, bytes.fromhex('AABBCC00FF')),
+        (0x9000, bytes.fromhex('454F46')),
+    ]
+    image = segments.to_image()
+    
+    if (list(segments) == expected and segments.size() == 14
+            and [len(r.split('^')[3]) // 2 for r in records] == [30, 30, 10]
+            and len(image) == 0x8003 and image[0x3FFE:0x4003] == expected[1][1]
+            and segments.read(0x1004, 4) == bytes.fromhex('20390000')):
+        print("\n✓ Segment map test passed")
+    else:
+        print("\n✗ Test failed")
+
+
+if __name__ == '__main__':
+    test_segments()
\ No newline at end of file
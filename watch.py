@@ -0,0 +1,194 @@
+"""
+Watch Mode for SIC/XE Assembler
+Polls a directory and re-assembles changed .asm files
+
+Team: Ilyas, Nadja (Shared)
+"""
+
+import argparse
+import os
+import time
+
+from assembler import assemble_file
+from data_structures import OPTAB
+
+
+class Watcher:
+    """Rebuilds .asm files under a directory when their mtime or size changes
+    
+    Results for unchanged files are kept and reused. A file is also
+    rebuilt when a file it includes changes or is deleted; files that
+    other files include are not assembled on their own. A burst of edits
+    is coalesced: after a change is seen, rebuilding waits until a full
+    scan finds nothing new for `settle` seconds.
+    """
+    
+    def __init__(self, directory, interval=0.5, settle=0.3, listing=False):
+        self.directory = directory
+        self.interval = interval
+        self.settle = settle
+        self.listing = listing
+        self.optab = OPTAB()  # Built once and shared by every rebuild
+        self.stamps = {}      # path -> (mtime_ns, size) at last build
+        self.results = {}     # path -> AssemblyResult from last build
+        self.depends = {}     # path -> real paths of the files it includes
+        
+    def scan(self):
+        """Get {path: (mtime_ns, size)} for every .asm file under directory"""
+        stamps = {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name.endswith('.asm'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # Deleted between listing and stat
+                    stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+        
+    def modified(self, stamps):
+        """Paths whose stamp differs from the last scan"""
+        return sorted(path for path, stamp in stamps.items()
+                      if self.stamps.get(path) != stamp)
+                      
+    def included(self):
+        """Real paths of the files some watched file includes
+        
+        Taken from the includes each file's last build expanded. A file
+        including itself is left out, so it is still built to report the
+        cycle.
+        """
+        included = set()
+        for path, depends in self.depends.items():
+            included |= depends - {os.path.realpath(path)}
+        return included
+        
+    def changed(self, stamps, removed=()):
+        """Paths to rebuild: modified files and files including a modified one
+        
+        Files that some other file included in its last build are never
+        assembled on their own; their new stamps are recorded here instead.
+        """
+        modified = self.modified(stamps)
+        included = self.included()
+        touched = {os.path.realpath(path) for path in modified + list(removed)}
+        
+        paths = []
+        for path in sorted(stamps):
+            if os.path.realpath(path) in included:
+                if path in modified:
+                    self.stamps[path] = stamps[path]
+                    self.results.pop(path, None)
+            elif path in modified or self.depends.get(path, set()) & touched:
+                paths.append(path)
+        return paths
+        
+    def wait_for_quiet(self, stamps):
+        """Keep rescanning until the tree is stable for `settle` seconds"""
+        while True:
+            time.sleep(self.settle)
+            latest = self.scan()
+            if latest == stamps:
+                return latest
+            stamps = latest
+            
+    def rebuild(self, paths, stamps):
+        """Assemble paths, printing per-file timings; returns results
+        
+        Each build records the files it included. A path that turns out
+        to be included by another file (say both are new) is dropped
+        from the results instead of being reported on its own.
+        """
+        built = []
+        for path in paths:
+            listing = os.path.splitext(path)[0] + '.lst' if self.listing else None
+            self.stamps[path] = stamps[path]
+            try:
+                result = assemble_file(path, listing=listing, optab=self.optab)
+            except Exception as e:
+                print(f"  {path}: failed ({e})")
+                continue
+                
+            self.results[path] = result
+            self.depends[path] = result.includes
+            built.append(result)
+            
+        included = self.included()
+        results = []
+        for result in built:
+            if os.path.realpath(result.source) in included:
+                self.results.pop(result.source, None)
+                continue
+            results.append(result)
+            
+            status = "ok" if result.ok else f"{len(result.errors)} diagnostic(s)"
+            print(f"  {result.source}: {result.elapsed * 1000:.1f} ms ({status})")
+            for error in result.errors:
+                print(f"    {error}")
+            for message in result.write_errors:
+                print(f"    {message}")
+        return results
+        
+    def forget_deleted(self, stamps):
+        """Drop cached results for files that no longer exist; returns their paths"""
+        removed = [path for path in self.stamps if path not in stamps]
+        for path in removed:
+            del self.stamps[path]
+            self.results.pop(path, None)
+            self.depends.pop(path, None)
+            print(f"  {path}: removed")
+        return removed
+        
+    def poll_once(self, wait=True):
+        """Run one scan/rebuild cycle; returns the rebuilt results"""
+        stamps = self.scan()
+        removed = self.forget_deleted(stamps)
+        
+        if not removed and not self.modified(stamps):
+            return []
+            
+        if wait:
+            stamps = self.wait_for_quiet(stamps)
+            removed += self.forget_deleted(stamps)
+            
+        paths = self.changed(stamps, removed)
+        start = time.perf_counter()
+        results = self.rebuild(paths, stamps)
+        print(f"Rebuilt {len(results)} of {len(stamps)} file(s) in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        return results
+        
+    def run(self):
+        """Watch until interrupted"""
+        print(f"Watching {self.directory} (Ctrl+C to stop)")
+        self.poll_once(wait=False)
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.poll_once()
+        except KeyboardInterrupt:
+            print("\nStopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-assemble .asm files when they change")
+    parser.add_argument('directory', nargs='?', default='.', help="Directory to watch")
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help="Seconds between scans (default: 0.5)")
+    parser.add_argument('--settle', type=float, default=0.3,
+                        help="Quiet time before rebuilding a burst of edits (default: 0.3)")
+    parser.add_argument('--listing', action='store_true', help="Also write .lst files")
+    parser.add_argument('--once', action='store_true', help="Build changed files once and exit")
+    args = parser.parse_args(argv)
+    
+    watcher = Watcher(args.directory, args.interval, args.settle, args.listing)
+    if args.once:
+        watcher.poll_once(wait=False)
+    else:
+        watcher.run()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file